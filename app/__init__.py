@@ -7,7 +7,15 @@ import logging
 from logging.handlers import RotatingFileHandler
 
 from config import Config
-from app.utility.jinja2 import jinja_markdown 
+from app.utility.jinja2 import jinja_markdown, template_cache
+from app.utility.cache import page_cache
+from app.utility.similarity import similarity_index
+from app.utility.ratelimit import rate_limiter
+from app.utility.conditional import conditional_get
+from app.utility.compression import compression
+from app.utility.assets import asset_manifest
+from app.utility.images import image_pipeline
+from app.utility.site import static_site
 
 
 db = SQLAlchemy()
@@ -19,6 +27,19 @@ def create_app(config_class = Config):
 
     db.init_app(app)
     migrate.init_app(app, db)
+    template_cache.init_app(app)
+    page_cache.init_app(app)
+    similarity_index.init_app(app)
+    rate_limiter.init_app(app)
+    conditional_get.init_app(app)
+    compression.init_app(app)
+    asset_manifest.init_app(app)
+    image_pipeline.init_app(app)
+    static_site.init_app(app)
+
+    from app.models import related_graph, facet_index
+    related_graph.ttl = app.config['RELATED_GRAPH_TTL']
+    facet_index.ttl = app.config['FACET_INDEX_TTL']
 
     from app.errors import bp as errors_bp
     app.register_blueprint(errors_bp)
@@ -29,6 +50,12 @@ def create_app(config_class = Config):
     from app.api import bp as api_bp
     app.register_blueprint(api_bp)
 
+    from app.feeds import bp as feeds_bp
+    app.register_blueprint(feeds_bp)
+
+    from app.cli import bp as cli_bp
+    app.register_blueprint(cli_bp)
+
     if not os.path.exists('logs'):
         os.mkdir('logs')
     file_handler = RotatingFileHandler('logs/flask_application.log', maxBytes=10240, backupCount=10)
@@ -42,4 +69,4 @@ def create_app(config_class = Config):
     app.jinja_env.filters['render_jinja'] = jinja_markdown
     return app
 
-from app import models
+from app import models, events
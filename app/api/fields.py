@@ -0,0 +1,138 @@
+"""
+Sparse fieldsets for the read API.
+
+Each resource lists the fields a response can contain, the columns every field needs loaded and
+the relationships that can be embedded, so a request for `?fields=title,slug` only ever selects
+those columns and `?embed=sections` only loads the sections.
+"""
+from typing import Any, Callable, NamedTuple
+
+from sqlalchemy.orm import load_only, joinedload, selectinload
+
+from app.models import BlogPost, Project
+
+
+class Field(NamedTuple):
+    get: Callable[[Any], Any]
+    columns: tuple[str, ...]
+
+
+class Resource(NamedTuple):
+    model: type
+    fields: dict[str, Field]
+    embeds: dict[str, Callable[[Any], Any]]
+    list_fields: tuple[str, ...]
+
+
+def column(name: str) -> Field:
+    return Field(lambda obj: getattr(obj, name), (name,))
+
+
+def timestamp(name: str) -> Field:
+    return Field(lambda obj: getattr(obj, name).isoformat() if getattr(obj, name) else None, (name,))
+
+
+def enum(name: str) -> Field:
+    return Field(lambda obj: getattr(obj, name).value, (name,))
+
+
+COMMON_FIELDS = {
+    'id': column('id'),
+    'title': column('title'),
+    'subtitle': column('subtitle'),
+    'slug': column('slug'),
+    'extract': column('extract'),
+    'image': column('image'),
+    'created_at': timestamp('created_at'),
+    'updated_at': timestamp('updated_at'),
+    'url': Field(lambda obj: obj.url, ('id', 'slug')),
+    'category': Field(lambda obj: obj.category.title if obj.category else None, ('category_id',)),
+}
+
+COMMON_EMBEDS = {
+    'tags': lambda obj: [tag.title for tag in obj.tags],
+    'technologies': lambda obj: [{
+        'title': tech.title,
+        'type': tech.type.value,
+        'image': tech.image,
+    } for tech in obj.technologies],
+}
+
+POSTS = Resource(
+    model=BlogPost,
+    fields={
+        **COMMON_FIELDS,
+        'thumbnail': column('thumbnail'),
+        'body': column('body'),
+        'html': Field(lambda post: str(post.html), ('body', 'body_html')),
+    },
+    embeds=COMMON_EMBEDS,
+    list_fields=('id', 'title', 'subtitle', 'slug', 'extract', 'created_at', 'url'),
+)
+
+PROJECTS = Resource(
+    model=Project,
+    fields={
+        **COMMON_FIELDS,
+        'status': enum('status'),
+        'github_url': column('github_url'),
+        'deployment_url': column('deployment_url'),
+        'featured_order': column('featured_order'),
+    },
+    embeds={
+        **COMMON_EMBEDS,
+        'features': lambda project: [{
+            'id': feature.id,
+            'title': feature.title,
+            'status': feature.status.value,
+            'order': feature.order,
+        } for feature in project.features],
+        'sections': lambda project: [{
+            'id': section.id,
+            'type': section.type.value,
+            'title': section.title,
+            'icon': section.icon,
+            'order': section.order,
+            'body': section.body,
+            'html': str(section.html),
+        } for section in project.sections],
+    },
+    list_fields=('id', 'title', 'subtitle', 'slug', 'extract', 'status', 'created_at', 'url'),
+)
+
+
+def parse_list(value: str | None) -> list[str]:
+    return [name.strip() for name in value.split(',') if name.strip()] if value else []
+
+
+def select_fields(resource: Resource, args, detail: bool) -> tuple[list[str], list[str]]:
+    """The fields and embeds requested by ?fields= and ?embed=, raises ValueError for unknown names"""
+    fields = parse_list(args.get('fields')) or (list(resource.fields) if detail else list(resource.list_fields))
+    embeds = parse_list(args.get('embed'))
+    for name in fields:
+        if name not in resource.fields:
+            raise ValueError(f'Unknown field: {name}')
+    for name in embeds:
+        if name not in resource.embeds:
+            raise ValueError(f'Unknown embed: {name}')
+    return fields, embeds
+
+
+def resource_query(resource: Resource, fields: list[str], embeds: list[str]):
+    """Query loading only the columns behind the fields, and the embedded relationships"""
+    model = resource.model
+    # The keyset cursor always needs (created_at, id)
+    columns = {'id', 'created_at'}
+    for name in fields:
+        columns.update(resource.fields[name].columns)
+    options = [load_only(*(getattr(model, name) for name in sorted(columns)))]
+    if 'category' in fields:
+        options.append(joinedload(model.category))
+    options.extend(selectinload(getattr(model, name)) for name in embeds)
+    return model.query.options(*options)
+
+
+def serialize(resource: Resource, obj, fields: list[str], embeds: list[str]) -> dict:
+    data = {name: resource.fields[name].get(obj) for name in fields}
+    data.update((name, resource.embeds[name](obj)) for name in embeds)
+    return data
@@ -1,45 +1,57 @@
-from flask import render_template, render_template_string, request, jsonify, current_app
+from flask import render_template, render_template_string, request, jsonify, current_app, url_for, g
 from app.api import bp
-from app.models import BlogPost, Project, Category, ProjectFeature, ProjectSection, SectionType, Technology, Tag
-from app.models import ContentType, DevelopmentStatus
+from app.models import BlogPost, Project, Category, ProjectFeature, ProjectSection, SectionType, Technology, Tag, TechnologyType
+from app.models import ContentType, DevelopmentStatus, search_content, keyset_page
+from app.api.fields import POSTS, PROJECTS, select_fields, resource_query, serialize
 from app import db
+from app.utility.jinja2 import template_cache
+from app.utility.cache import page_cache
+from app.utility.ratelimit import rate_limiter
+from app.utility.conditional import conditional_get
+from app.utility.images import image_pipeline
+from app.feeds.cache import feed_cache
+from app.feeds.sitemap import sitemap_cache
 from markupsafe import Markup
 from markdown import markdown
 from functools import wraps
 from datetime import datetime, timezone
-from collections import defaultdict
-from time import time
+from math import ceil
+from typing import NamedTuple
+from collections import Counter
+from sqlalchemy.exc import IntegrityError
 
-request_counts = defaultdict(list)
-
-def rate_limit_check():
-    """Simple rate limiting by IP address"""
-    if not current_app.config['ENABLE_RATE_LIMITING'].lower() == 'true':
+def rate_limit_check(cost=1):
+    """Rate limiting by IP address, the result is reported in the response headers"""
+    if not rate_limiter.enabled:
         return True
-    
-    ip = request.remote_addr
-    now = time()
-    
-    # Clean old requests
-    request_counts[ip] = [req_time for req_time in request_counts[ip] 
-                          if now - req_time < int(current_app.config['RATE_WINDOW'])]
-    
-    # Check limit
-    if len(request_counts[ip]) >= int(current_app.config['RATE_LIMIT']):
-        return False
-    
-    # Add current request
-    request_counts[ip].append(now)
-    return True
+    g.rate_limit = rate_limiter.hit(request.remote_addr or 'unknown', cost)
+    return g.rate_limit.allowed
+
+def require_rate_limit(f=None, *, cost=1):
+    """Spend `cost` tokens per request, heavier endpoints use @require_rate_limit(cost=N)"""
+    if f is None:
+        return lambda f: require_rate_limit(f, cost=cost)
 
-def require_rate_limit(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not rate_limit_check():
+        if not rate_limit_check(cost):
             return jsonify({'error': 'Rate limit exceeded. Try again later.'}), 429
         return f(*args, **kwargs)
     return decorated_function
 
+@bp.after_request
+def add_rate_limit_headers(response):
+    """Let clients pace themselves instead of retrying into 429s"""
+    result = g.get('rate_limit')
+    if result is not None:
+        response.headers['RateLimit-Policy'] = f'{result.limit};w={int(rate_limiter.window)}'
+        response.headers['RateLimit-Limit'] = str(result.limit)
+        response.headers['RateLimit-Remaining'] = str(result.remaining)
+        response.headers['RateLimit-Reset'] = str(ceil(result.reset_after))
+        if not result.allowed:
+            response.headers['Retry-After'] = str(ceil(result.retry_after))
+    return response
+
 def require_api_key(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -52,55 +64,128 @@ def require_api_key(f):
         return f(*args, **kwargs)
     return decorated_function
 
-# Helper function to get or create tags
-def get_or_create_tags(tag_titles):
-    """Get existing tags or create new ones"""
-    tags = []
-    for title in tag_titles:
-        tag = Tag.query.filter_by(title=title).first()
-        if not tag:
-            tag = Tag(title=title)
-            db.session.add(tag)
-        tags.append(tag)
-    return tags
-
-# Helper function to get or create technologies
-def get_or_create_technologies(tech_data_list):
-    """Get existing technologies or create new ones"""
-    technologies = []
-    for tech_data in tech_data_list:
-        tech_title = tech_data if isinstance(tech_data, str) else tech_data.get('title')
-        tech = Technology.query.filter_by(title=tech_title).first()
-        if not tech and isinstance(tech_data, dict):
-            # Create new technology with full data
-            tech = Technology(
-                title=tech_data['title'],
-                type=tech_data['type'],
-                image=tech_data.get('image'),
-                order=tech_data['order']
-            )
-            db.session.add(tech)
-        technologies.append(tech)
-    return technologies
+class ValidationError(Exception):
+    """A write that cannot be applied, reported to the client as a 400"""
 
-@bp.route('/posts', methods=['POST'])
-@require_api_key
-@require_rate_limit
-def create_post():
-    """Create a new blog post"""
-    data = request.get_json()
-    
-    # Validate required fields
-    required_fields = ['title', 'body', 'extract', 'slug', 'image']
-    for field in required_fields:
+
+class Resolved(NamedTuple):
+    """Categories, tags and technologies referenced by one or more writes, resolved up front"""
+    categories: dict[tuple[str, ContentType], Category]
+    tags: dict[str, Tag]
+    technologies: dict[str, Technology]
+
+
+def require_fields(data, fields, prefix=''):
+    """Raise a ValidationError for the first missing field"""
+    if not isinstance(data, dict):
+        raise ValidationError(f'Expected an object{" for " + prefix.rstrip(".") if prefix else ""}')
+    for field in fields:
         if field not in data:
-            return jsonify({'error': f'Missing required field: {field}'}), 400
-    
-    # Check if slug already exists
-    if BlogPost.query.filter_by(slug=data['slug']).first():
-        return jsonify({'error': 'Slug already exists'}), 400
-    
-    # Create the blog post
+            raise ValidationError(f'Missing required field: {prefix}{field}')
+
+def parse_enum(enum, value, field):
+    """Convert a value to an enum member, raising a ValidationError for unknown values"""
+    try:
+        return enum(value)
+    except ValueError:
+        raise ValidationError(f'Invalid {field}: {value}')
+
+def technology_title(tech_data):
+    return tech_data if isinstance(tech_data, str) else tech_data.get('title')
+
+def resolve_relations(items) -> Resolved:
+    """Resolve the relations of any number of writes with one round of queries"""
+    category_titles = {data['category'] for data in items if data.get('category')}
+    tag_titles = [title for data in items if isinstance(data.get('tags'), list) for title in data['tags']]
+    technologies = [tech for data in items if isinstance(data.get('technologies'), list) for tech in data['technologies']]
+    categories = Category.query.filter(Category.title.in_(category_titles)).all() if category_titles else []
+    return Resolved(
+        categories={(category.title, category.type): category for category in categories},
+        tags=Tag.resolve_titles(tag_titles) if tag_titles else {},
+        technologies=Technology.resolve_titles(technologies) if technologies else {},
+    )
+
+def pick(lookup, titles):
+    return list(dict.fromkeys(lookup[title] for title in titles if title in lookup))
+
+def apply_relations(obj, data, content_type, resolved):
+    """Set the category, tags and technologies of a blog post or project"""
+    if 'category' in data:
+        obj.category = resolved.categories.get((data['category'], content_type))
+    if 'tags' in data and isinstance(data['tags'], list):
+        obj.tags = pick(resolved.tags, data['tags'])
+    if 'technologies' in data and isinstance(data['technologies'], list):
+        obj.technologies = pick(resolved.technologies, [technology_title(tech) for tech in data['technologies']])
+
+def validate_technologies(data):
+    if 'technologies' in data and isinstance(data['technologies'], list):
+        for i, tech_data in enumerate(data['technologies']):
+            if not isinstance(tech_data, str):
+                require_fields(tech_data, ['title', 'type', 'order'], f'technologies[{i}].')
+                parse_enum(TechnologyType, tech_data['type'], f'technologies[{i}].type')
+
+def validate_post(data, create):
+    if create:
+        require_fields(data, ['title', 'body', 'extract', 'slug', 'image'])
+    else:
+        require_fields(data, [])
+    validate_technologies(data)
+
+def validate_feature(data, create, prefix=''):
+    require_fields(data, ['title'] if create else [], prefix)
+    if 'status' in data:
+        parse_enum(DevelopmentStatus, data['status'], f'{prefix}status')
+
+def validate_section(data, create, prefix=''):
+    require_fields(data, ['type', 'body'] if create else [], prefix)
+    if 'type' in data:
+        parse_enum(SectionType, data['type'], f'{prefix}type')
+
+def validate_project(data, create):
+    if create:
+        require_fields(data, ['title', 'subtitle', 'extract', 'slug', 'features', 'sections'])
+        if not isinstance(data['features'], list) or not isinstance(data['sections'], list):
+            raise ValidationError('Features and sections must be lists')
+        for i, feature in enumerate(data['features']):
+            validate_feature(feature, True, f'features[{i}].')
+        for i, section in enumerate(data['sections']):
+            validate_section(section, True, f'sections[{i}].')
+    else:
+        require_fields(data, [])
+    if 'status' in data:
+        parse_enum(DevelopmentStatus, data['status'], 'status')
+    validate_technologies(data)
+
+# Fields of blog posts and projects that no two rows can share
+UNIQUE_FIELDS = ('slug', 'title')
+
+# Fields an update may change, a project keeps the slug it was created with
+UPDATE_FIELDS = {
+    BlogPost: ('title', 'subtitle', 'body', 'extract', 'slug', 'image', 'thumbnail'),
+    Project: ('title', 'subtitle', 'extract', 'github_url', 'deployment_url', 'image', 'featured_order'),
+}
+
+def written_unique_fields(model, data, update):
+    """The unique fields a create or update of a blog post or project writes"""
+    return [field for field in UNIQUE_FIELDS if field in data and (not update or field in UPDATE_FIELDS[model])]
+
+def conflicting_values(model, field, changes):
+    """The values among (value, id) changes that are repeated or taken by another row, in one query"""
+    column = getattr(model, field)
+    counts = Counter(value for value, _ in changes)
+    conflicts = {value for value, count in counts.items() if count > 1}
+    taken = dict(db.session.query(column, model.id).filter(column.in_(counts)).all()) if counts else {}
+    conflicts.update(value for value, obj_id in changes if value in taken and taken[value] != obj_id)
+    return conflicts
+
+def check_unique(model, data, obj_id=None):
+    """Raise a ValidationError if a write would take the slug or title of another row"""
+    for field in written_unique_fields(model, data, obj_id is not None):
+        if conflicting_values(model, field, [(data[field], obj_id)]):
+            raise ValidationError(f'{field.capitalize()} already exists')
+
+def build_post(data, resolved):
+    """Create a new blog post from validated data"""
     post = BlogPost(
         title=data['title'],
         created_at=data.get('created_at'),
@@ -111,23 +196,117 @@ def create_post():
         image=data['image'],
         thumbnail=data.get('thumbnail')
     )
-    
-    # Handle category
-    if 'category' in data:
-        category = Category.query.filter_by(title=data['category'], type=ContentType.BLOG).first()
-        if category:
-            post.category = category
-    
-    # Handle tags
-    if 'tags' in data and isinstance(data['tags'], list):
-        post.tags = get_or_create_tags(data['tags'])
-    
-    # Handle technologies
-    if 'technologies' in data and isinstance(data['technologies'], list):
-        post.technologies = get_or_create_technologies(data['technologies'])
-    
+    post.render_body()
+    apply_relations(post, data, ContentType.BLOG, resolved)
+    return post
+
+def apply_post(post, data, resolved):
+    """Update an existing blog post from validated data"""
+    for field in UPDATE_FIELDS[BlogPost]:
+        if field in data:
+            setattr(post, field, data[field])
+    apply_relations(post, data, ContentType.BLOG, resolved)
+
+    # Re-render the stored body if the Markdown changed
+    post.render_body()
+    post.updated_at = datetime.now(timezone.utc)
+
+def build_feature(data, project_id=None):
+    return ProjectFeature(
+        title=data['title'],
+        status=DevelopmentStatus(data.get('status', 'planned')),
+        order=int(data.get('order', 0)),
+        project_id=project_id)
+
+def apply_feature(feature, data):
+    if 'title' in data:
+        feature.title = data['title']
+    if 'status' in data:
+        feature.status = DevelopmentStatus(data['status'])
+    if 'order' in data:
+        feature.order = data['order']
+
+def build_section(data, project_id=None):
+    section = ProjectSection(
+        type=SectionType(data['type']),
+        title=data.get('title') or None,
+        icon=data.get('icon') or None,
+        body=data['body'],
+        order=int(data.get('order', 0)),
+        project_id=project_id)
+    section.render_body()
+    return section
+
+def apply_section(section, data):
+    if 'title' in data:
+        section.title = data['title']
+    if 'type' in data:
+        section.type = SectionType(data['type'])
+    if 'body' in data:
+        section.body = data['body']
+    if 'icon' in data:
+        section.icon = data['icon']
+    if 'order' in data:
+        section.order = data['order']
+    section.render_body()
+
+def build_project(data, resolved):
+    """Create a new project with its features and sections from validated data"""
+    project = Project(
+        title=data['title'],
+        subtitle=data['subtitle'],
+        status=DevelopmentStatus(data.get('status', 'in_progress')),
+        extract=data['extract'],
+        deployment_url=data.get('deployment_url') or None,
+        github_url=data.get('github_url') or None,
+        image=data.get('image') or None,
+        featured_order=data.get('featured_order') or None,
+        features=[build_feature(feature) for feature in data['features']],
+        sections=[build_section(section) for section in data['sections']],
+        slug=data['slug'])
+    apply_relations(project, data, ContentType.PROJECT, resolved)
+    return project
+
+def apply_project(project, data, resolved):
+    """Update an existing project from validated data"""
+    for field in UPDATE_FIELDS[Project]:
+        if field in data:
+            setattr(project, field, data[field])
+    if 'status' in data:
+        project.status = DevelopmentStatus(data['status'])
+    apply_relations(project, data, ContentType.PROJECT, resolved)
+    project.updated_at = datetime.now(timezone.utc)
+
+def image_jobs(kind, obj_id, data):
+    """The images a write put on a post or project, with the keys of the pages showing them"""
+    if not image_pipeline.enabled:
+        return []
+    jobs = [(data[field], (kind, f'{kind}:{obj_id}')) for field in ('image', 'thumbnail') if data.get(field)]
+    jobs.extend((tech['image'], ('technology', 'blogpost', 'project')) for tech in data.get('technologies') or ()
+                if isinstance(tech, dict) and tech.get('image'))
+    return jobs
+
+def queue_images(jobs):
+    """Resize the written images in the background, only call this once the write is committed"""
+    for image, keys in jobs:
+        image_pipeline.submit(image, keys)
+
+@bp.route('/posts', methods=['POST'])
+@require_api_key
+@require_rate_limit(cost=3)
+def create_post():
+    """Create a new blog post"""
+    data = request.get_json()
+    try:
+        validate_post(data, create=True)
+        check_unique(BlogPost, data)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    post = build_post(data, resolve_relations([data]))
     db.session.add(post)
     db.session.commit()
+    queue_images(image_jobs('blogpost', post.id, data))
     
     return jsonify({
         'message': 'Blog post created successfully',
@@ -138,49 +317,20 @@ def create_post():
 
 @bp.route('/posts/<int:post_id>', methods=['PUT', 'PATCH'])
 @require_api_key
-@require_rate_limit
+@require_rate_limit(cost=3)
 def update_post(post_id):
     """Update an existing blog post"""
     post = BlogPost.query.get_or_404(post_id)
     data = request.get_json()
-    
-    # Update fields if provided
-    if 'title' in data:
-        post.title = data['title']
-    if 'subtitle' in data:
-        post.subtitle = data['subtitle']
-    if 'body' in data:
-        post.body = data['body']
-    if 'extract' in data:
-        post.extract = data['extract']
-    if 'slug' in data:
-        # Check if new slug is already taken by another post
-        existing = BlogPost.query.filter_by(slug=data['slug']).first()
-        if existing and existing.id != post_id:
-            return jsonify({'error': 'Slug already exists'}), 400
-        post.slug = data['slug']
-    if 'image' in data:
-        post.image = data['image']
-    if 'thumbnail' in data:
-        post.thumbnail = data['thumbnail']
-    
-    # Update category
-    if 'category' in data:
-        category = Category.query.filter_by(title=data['category'], type=ContentType.BLOG).first()
-        post.category = category
-    
-    # Update tags
-    if 'tags' in data and isinstance(data['tags'], list):
-        post.tags = get_or_create_tags(data['tags'])
-    
-    # Update technologies
-    if 'technologies' in data and isinstance(data['technologies'], list):
-        post.technologies = get_or_create_technologies(data['technologies'])
-    
-    # Update timestamp
-    post.updated_at = datetime.now(timezone.utc)
-    
+    try:
+        validate_post(data, create=False)
+        check_unique(BlogPost, data, post_id)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    apply_post(post, data, resolve_relations([data]))
     db.session.commit()
+    queue_images(image_jobs('blogpost', post_id, data))
     
     return jsonify({
         'message': 'Blog post updated successfully',
@@ -201,68 +351,20 @@ def delete_post(post_id):
 
 @bp.route('/projects', methods=['POST'])
 @require_api_key
+@require_rate_limit(cost=5)
 def create_project():
     """Create a new project"""
     data = request.get_json()
-    
-    # Validate required fields
-    required_fields = ['title', 'subtitle', 'extract', 'slug', 'features', 'sections']
-    for field in required_fields:
-        if field not in data:
-            return jsonify({'error': f'Missing required field: {field}'}), 400
- 
-    # Check if slug already exists
-    if Project.query.filter_by(slug=data['slug']).first():
-        return jsonify({'error': 'Slug already exists'}), 400
-    
-    # Create features
-    features = []
-    for feature in data['features']:
-        features.append(ProjectFeature(
-            title=feature['title'],
-            status=feature.get('status', 'planned'),
-            order=int(feature.get('order', 0))))
-
-    # Create sections
-    sections = []
-    for section in data['sections']:
-        sections.append(ProjectSection(
-            type=SectionType(section['type']),
-            title=section.get('title') or None,
-            icon=section.get('icon') or None,
-            body=section['body'],
-            order=int(section.get('order', 0))))
-
-    # Create the project
-    project = Project(
-        title=data['title'],
-        subtitle=data['subtitle'],
-        status=DevelopmentStatus(data.get('status', 'in_progress')),
-        extract=data['extract'],
-        deployment_url=data.get('deployment_url') or None,
-        github_url=data.get('github_url') or None,
-        image=data.get('image') or None,
-        featured_order=data.get('featured_order') or None,
-        features=features,
-        sections=sections,
-        slug=data['slug'])
+    try:
+        validate_project(data, create=True)
+        check_unique(Project, data)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
 
-    # Handle category
-    if 'category' in data:
-        category = Category.query.filter_by(title=data['category'], type=ContentType.PROJECT).first()
-        if category:
-            project.category = category
-    
-    # Handle tags
-    if 'tags' in data and isinstance(data['tags'], list):
-        project.tags = get_or_create_tags(data['tags'])
-    
-    # Handle technologies
-    if 'technologies' in data and isinstance(data['technologies'], list):
-        project.technologies = get_or_create_technologies(data['technologies'])
-    
+    project = build_project(data, resolve_relations([data]))
     db.session.add(project)
     db.session.commit()
+    queue_images(image_jobs('project', project.id, data))
     
     return jsonify({
         'message': 'Project created successfully',
@@ -272,47 +374,20 @@ def create_project():
 
 @bp.route('/projects/<int:project_id>', methods=['PUT', 'PATCH'])
 @require_api_key
-@require_rate_limit
+@require_rate_limit(cost=3)
 def update_project(project_id):
     """Update an existing project"""
     project = Project.query.get_or_404(project_id)
     data = request.get_json()
-    
-    # Update fields if provided
-    if 'title' in data:
-        project.title = data['title']
-    if 'subtitle' in data:
-        project.subtitle = data['subtitle']
-    if 'extract' in data:
-        project.extract = data['extract']
-    if 'status' in data:
-        project.status = DevelopmentStatus(data['status'])
-    if 'github_url' in data:
-        project.github_url = data['github_url']
-    if 'deployment_url' in data:
-        project.deployment_url = data['deployment_url']
-    if 'image' in data:
-        project.image = data['image']
-    if 'featured_order' in data:
-        project.featured_order = data['featured_order']
-    
-    # Update category
-    if 'category' in data:
-        category = Category.query.filter_by(title=data['category'], type=ContentType.PROJECT).first()
-        project.category = category
-    
-    # Update tags
-    if 'tags' in data and isinstance(data['tags'], list):
-        project.tags = get_or_create_tags(data['tags'])
-    
-    # Update technologies
-    if 'technologies' in data and isinstance(data['technologies'], list):
-        project.technologies = get_or_create_technologies(data['technologies'])
-    
-    # Update timestamp
-    project.updated_at = datetime.now(timezone.utc)
-    
+    try:
+        validate_project(data, create=False)
+        check_unique(Project, data, project_id)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    apply_project(project, data, resolve_relations([data]))
     db.session.commit()
+    queue_images(image_jobs('project', project_id, data))
     
     return jsonify({
         'message': 'Project updated successfully',
@@ -337,19 +412,12 @@ def add_project_feature(project_id):
     """Add a feature to a project"""
     project = Project.query.get_or_404(project_id)
     data = request.get_json()
-    
-    # Validate required fields
-    if 'title' not in data:
-        return jsonify({'error': 'Missing required field: title'}), 400
-    
-    # Create feature
-    feature = ProjectFeature(
-        title=data['title'],
-        status=DevelopmentStatus(data.get('status', 'planned')),
-        order=data.get('order', 0),
-        project_id=project_id
-    )
-    
+    try:
+        validate_feature(data, create=True)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    feature = build_feature(data, project_id)
     db.session.add(feature)
     db.session.commit()
     
@@ -370,15 +438,12 @@ def update_project_feature(project_id, feature_id):
     ).first_or_404()
     
     data = request.get_json()
-    
-    # Update fields if provided
-    if 'title' in data:
-        feature.title = data['title']
-    if 'status' in data:
-        feature.status = DevelopmentStatus(data['status'])
-    if 'order' in data:
-        feature.order = data['order']
-    
+    try:
+        validate_feature(data, create=False)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    apply_feature(feature, data)
     db.session.commit()
     
     return jsonify({
@@ -403,28 +468,17 @@ def delete_project_feature(project_id, feature_id):
 
 @bp.route('/projects/<int:project_id>/sections', methods=['POST'])
 @require_api_key
-@require_rate_limit
+@require_rate_limit(cost=2)
 def add_project_section(project_id):
     """Add a section to a project"""
     project = Project.query.get_or_404(project_id)
     data = request.get_json()
-    
-    # Validate required fields
-    required = ['type', 'body']
-    for field in required:
-        if field not in data:
-            return jsonify({'error': f'Missing required field: {field}'}), 400
-    
-    # Create section
-    section = ProjectSection(
-        type=SectionType(data['type']),
-        title=data.get('title') or None,
-        body=data['body'],
-        icon=data.get('icon') or None,
-        order=data.get('order', 0),
-        project_id=project_id
-    )
-    
+    try:
+        validate_section(data, create=True)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    section = build_section(data, project_id)
     db.session.add(section)
     db.session.commit()
     
@@ -435,7 +489,7 @@ def add_project_section(project_id):
 
 @bp.route('/projects/<int:project_id>/sections/<int:section_id>', methods=['PATCH'])
 @require_api_key
-@require_rate_limit
+@require_rate_limit(cost=2)
 def update_project_section(project_id, section_id):
     """Update a specific section"""
     section = ProjectSection.query.filter_by(
@@ -444,19 +498,12 @@ def update_project_section(project_id, section_id):
     ).first_or_404()
     
     data = request.get_json()
-    
-    # Update fields if provided
-    if 'title' in data:
-        section.title = data['title']
-    if 'type' in data:
-        section.type = SectionType(data['type'])
-    if 'body' in data:
-        section.body = data['body']
-    if 'icon' in data:
-        section.icon = data['icon']
-    if 'order' in data:
-        section.order = data['order']
-    
+    try:
+        validate_section(data, create=False)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    apply_section(section, data)
     db.session.commit()
     
     return jsonify({
@@ -479,6 +526,282 @@ def delete_project_section(project_id, section_id):
     
     return jsonify({'message': 'Section deleted successfully'}), 200
 
+# Entity types of batch operations: model and name in messages
+BATCH_TYPES = {
+    'post': (BlogPost, 'Blog post'),
+    'project': (Project, 'Project'),
+    'feature': (ProjectFeature, 'Feature'),
+    'section': (ProjectSection, 'Section'),
+}
+
+BATCH_ACTIONS = ('create', 'update', 'delete')
+
+def validate_operation(operation):
+    """Check the shape and data of one batch operation, without touching the database"""
+    require_fields(operation, ['action', 'type'])
+    action, entity_type = operation['action'], operation['type']
+    if action not in BATCH_ACTIONS:
+        raise ValidationError(f'Invalid action: {action}')
+    if entity_type not in BATCH_TYPES:
+        raise ValidationError(f'Invalid type: {entity_type}')
+    if action != 'create' and not isinstance(operation.get('id'), int):
+        raise ValidationError('Missing required field: id')
+    if action == 'create' and entity_type in ('feature', 'section') and not isinstance(operation.get('project_id'), int):
+        raise ValidationError('Missing required field: project_id')
+    if action == 'delete':
+        return
+
+    data = operation.get('data')
+    if entity_type == 'post':
+        validate_post(data, action == 'create')
+    elif entity_type == 'project':
+        validate_project(data, action == 'create')
+    elif entity_type == 'feature':
+        validate_feature(data, action == 'create')
+    else:
+        validate_section(data, action == 'create')
+
+def load_targets(operations, errors):
+    """Load every row that is updated or deleted, or gets a feature or section, with one query per type"""
+    wanted = {entity_type: set() for entity_type in BATCH_TYPES}
+    for index, operation in operations:
+        if operation['action'] == 'create':
+            if operation['type'] in ('feature', 'section'):
+                wanted['project'].add(operation['project_id'])
+        else:
+            wanted[operation['type']].add(operation['id'])
+
+    targets = {}
+    for entity_type, ids in wanted.items():
+        model = BATCH_TYPES[entity_type][0]
+        targets[entity_type] = {obj.id: obj for obj in model.query.filter(model.id.in_(ids))} if ids else {}
+
+    for index, operation in operations:
+        if operation['action'] == 'create' and operation['type'] in ('feature', 'section'):
+            entity_type, entity_id = 'project', operation['project_id']
+        elif operation['action'] != 'create':
+            entity_type, entity_id = operation['type'], operation['id']
+        else:
+            continue
+        if entity_id not in targets[entity_type]:
+            errors.append({'index': index, 'error': f'{BATCH_TYPES[entity_type][1]} {entity_id} not found'})
+    return targets
+
+def check_batch_unique(operations, errors):
+    """Report every operation taking a slug or title that exists or is used twice in the batch"""
+    for entity_type in ('post', 'project'):
+        model = BATCH_TYPES[entity_type][0]
+        for field in UNIQUE_FIELDS:
+            changes = [(index, operation['data'][field], operation.get('id')) for index, operation in operations
+                       if operation['type'] == entity_type and operation['action'] != 'delete'
+                       and field in written_unique_fields(model, operation['data'], operation['action'] == 'update')]
+            conflicts = conflicting_values(model, field, [(value, obj_id) for _, value, obj_id in changes])
+            errors.extend({'index': index, 'error': f'{field.capitalize()} already exists: {value}'}
+                          for index, value, _ in changes if value in conflicts)
+
+def apply_operation(operation, targets, resolved):
+    """Apply one validated operation to the session, returns the created, updated or deleted row"""
+    action, entity_type = operation['action'], operation['type']
+    data = operation.get('data')
+    if action == 'delete':
+        obj = targets[entity_type][operation['id']]
+        db.session.delete(obj)
+        return obj
+    if action == 'update':
+        obj = targets[entity_type][operation['id']]
+        if entity_type == 'post':
+            apply_post(obj, data, resolved)
+        elif entity_type == 'project':
+            apply_project(obj, data, resolved)
+        elif entity_type == 'feature':
+            apply_feature(obj, data)
+        else:
+            apply_section(obj, data)
+        return obj
+
+    if entity_type == 'post':
+        obj = build_post(data, resolved)
+    elif entity_type == 'project':
+        obj = build_project(data, resolved)
+    elif entity_type == 'feature':
+        obj = build_feature(data, operation['project_id'])
+    else:
+        obj = build_section(data, operation['project_id'])
+    db.session.add(obj)
+    return obj
+
+@bp.route('/batch', methods=['POST'])
+@require_api_key
+@require_rate_limit(cost=5)
+def batch():
+    """
+    Apply many create, update and delete operations in one transaction, all or nothing.
+    Every operation is validated before any is applied, and the rows they reference are loaded
+    with one query per type, so a batch costs a handful of queries plus the writes themselves.
+    """
+    data = request.get_json()
+    operations = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'Missing required field: operations'}), 400
+    if len(operations) > current_app.config['BATCH_MAX_OPERATIONS']:
+        return jsonify({'error': f'Too many operations, at most {current_app.config["BATCH_MAX_OPERATIONS"]} per batch'}), 400
+
+    errors = []
+    for index, operation in enumerate(operations):
+        try:
+            validate_operation(operation)
+        except ValidationError as e:
+            errors.append({'index': index, 'error': str(e)})
+    if errors:
+        return jsonify({'error': 'Invalid operations, nothing was applied', 'errors': errors}), 400
+
+    indexed = list(enumerate(operations))
+    targets = load_targets(indexed, errors)
+    check_batch_unique(indexed, errors)
+    if errors:
+        return jsonify({'error': 'Invalid operations, nothing was applied', 'errors': sorted(errors, key=lambda e: e['index'])}), 400
+
+    resolved = resolve_relations([operation['data'] for operation in operations
+                                  if operation['type'] in ('post', 'project') and operation['action'] != 'delete'])
+    with db.session.no_autoflush:
+        applied = [apply_operation(operation, targets, resolved) for operation in operations]
+
+    try:
+        # Flush before committing, so the new ids are read without reloading every row afterwards
+        db.session.flush()
+        results = [{
+            'index': index,
+            'action': operation['action'],
+            'type': operation['type'],
+            'id': obj.id,
+            'status': 201 if operation['action'] == 'create' else 200,
+        } for (index, operation), obj in zip(indexed, applied)]
+        images = [job for operation, result in zip(operations, results)
+                  if operation['type'] in ('post', 'project') and operation['action'] != 'delete'
+                  for job in image_jobs('blogpost' if operation['type'] == 'post' else 'project', result['id'], operation['data'])]
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        current_app.logger.warning(f'Batch rejected by the database: {e.orig}')
+        return jsonify({'error': 'Conflicting operations, nothing was applied'}), 409
+
+    queue_images(images)
+    return jsonify({
+        'message': f'{len(results)} operations applied successfully',
+        'results': results,
+    }), 200
+
+def conditional_json(payload):
+    """JSON response with a strong ETag of its body, answered with a 304 if the client has it already"""
+    response = jsonify(payload)
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def page_limit(default: int, maximum: int = 100) -> int:
+    """The ?limit= of a listing, kept between 1 and `maximum`"""
+    return max(1, min(request.args.get('limit', default, type=int), maximum))
+
+def list_resource(resource, endpoint):
+    try:
+        fields, embeds = select_fields(resource, request.args, detail=False)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = page_limit(current_app.config['API_PAGE_SIZE'])
+
+    items, next_cursor = keyset_page(resource.model, resource_query(resource, fields, embeds), limit, request.args.get('cursor'))
+
+    return conditional_json({
+        'results': [serialize(resource, obj, fields, embeds) for obj in items],
+        'next_cursor': next_cursor,
+        'next': url_for(endpoint, **{**request.args.to_dict(), 'cursor': next_cursor}, _external=True) if next_cursor else None,
+    })
+
+def get_resource(resource, obj_id):
+    try:
+        fields, embeds = select_fields(resource, request.args, detail=True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    obj = resource_query(resource, fields, embeds).filter_by(id=obj_id).first_or_404()
+
+    return conditional_json(serialize(resource, obj, fields, embeds))
+
+@bp.route('/posts', methods=['GET'])
+@require_rate_limit
+def list_posts():
+    """Blog posts, newest first, with ?fields=, ?embed= and cursor pagination"""
+    return list_resource(POSTS, 'api.list_posts')
+
+@bp.route('/posts/<int:post_id>', methods=['GET'])
+@require_rate_limit
+def get_post(post_id):
+    """A single blog post, with ?fields= and ?embed="""
+    return get_resource(POSTS, post_id)
+
+@bp.route('/projects', methods=['GET'])
+@require_rate_limit
+def list_projects():
+    """Projects, newest first, with ?fields=, ?embed= and cursor pagination"""
+    return list_resource(PROJECTS, 'api.list_projects')
+
+@bp.route('/projects/<int:project_id>', methods=['GET'])
+@require_rate_limit
+def get_project(project_id):
+    """A single project, with ?fields= and ?embed="""
+    return get_resource(PROJECTS, project_id)
+
+@bp.route('/search', methods=['GET'])
+@require_rate_limit
+def search():
+    """Search blogposts and projects"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing required parameter: q'}), 400
+    limit = page_limit(current_app.config['SEARCH_PAGE_SIZE'])
+
+    results, next_cursor = search_content(query, limit, request.args.get('cursor'))
+
+    return jsonify({
+        'results': [{
+            'type': result.kind,
+            'id': obj.id,
+            'title': obj.title,
+            'url': obj.url,
+            'snippet': str(result.highlighted),
+        } for result, obj in results],
+        'next_cursor': next_cursor,
+        'next': url_for('api.search', q=query, limit=limit, cursor=next_cursor, _external=True) if next_cursor else None,
+    }), 200
+
+@bp.route('/cache/stats', methods=['GET'])
+@require_api_key
+def cache_stats():
+    """Hit, miss and eviction counters of the application caches"""
+    return jsonify({
+        'templates': template_cache.stats(),
+        'pages': page_cache.stats(),
+        'ratelimit': rate_limiter.stats(),
+        'conditional': conditional_get.stats(),
+        'images': image_pipeline.stats(),
+        'feeds': feed_cache.stats(),
+        'sitemaps': sitemap_cache.stats(),
+    }), 200
+
+@bp.route('/cache/purge', methods=['POST'])
+@require_api_key
+@require_rate_limit
+def cache_purge():
+    """Drop the cached pages depending on any of the given keys, e.g. {"keys": ["blogpost:3", "navbar"]}"""
+    data = request.get_json(silent=True)
+    keys = data.get('keys') if isinstance(data, dict) else None
+    if not isinstance(keys, list) or not keys or not all(isinstance(key, str) and key for key in keys):
+        return jsonify({'error': 'Expected keys as a list of strings'}), 400
+
+    purged = page_cache.purge(set(keys))
+    current_app.logger.info(f'Purged {purged} cached pages for {", ".join(sorted(set(keys)))}')
+    return jsonify({'purged': purged}), 200
+
 @bp.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Resource not found'}), 404
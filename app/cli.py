@@ -0,0 +1,217 @@
+import os
+from collections import Counter
+
+import click
+from flask import Blueprint, current_app, url_for
+
+from app import db
+from app.models import BlogPost, Project, Technology, ProjectSection, ContentType, similarity_documents, format_content_key, load_content, content_versions
+from app.models import FacetIndex, facet_index
+from app.feeds.sitemap import child_sitemaps
+from app.events import CONTENT_TYPE_KINDS, content_changed, changed_content
+from app.utility import search
+from app.utility.dump import dump_tables, export_rows, import_rows, clear_tables
+from app.utility.similarity import similarity_index
+from app.utility.compression import ENCODINGS, precompressed_files, write_precompressed
+from app.utility.assets import asset_manifest
+from app.utility.images import image_pipeline
+from app.utility.site import static_site, page_file
+
+bp = Blueprint('cli', __name__, cli_group=None)
+
+
+@bp.cli.group()
+def content():
+    """Content maintenance commands."""
+    pass
+
+
+@content.command('render')
+@click.option('--force', is_flag=True, help='Re-render every body, even if the stored HTML is up to date.')
+def render(force):
+    """Pre-render the HTML of all blogposts and project sections."""
+    rendered = 0
+    # Bodies may call url_for, so render them inside a request context
+    with current_app.test_request_context():
+        for post in BlogPost.query.all():
+            rendered += post.render_body(force=force)
+        for section in ProjectSection.query.all():
+            rendered += section.render_body(force=force)
+    db.session.commit()
+    click.echo(f'Rendered {rendered} bodies.')
+
+
+@content.command('similarity')
+def similarity():
+    """Build the content-similarity index and store it for the workers to load."""
+    similarity_index.build(similarity_documents(), content_versions())
+    similarity_index.save(current_app.config['SIMILARITY_INDEX_PATH'], format_content_key)
+    click.echo(f'Indexed {len(similarity_index)} documents.')
+
+
+@content.command('search-index')
+def search_index():
+    """Rebuild the full-text search index of all blogposts and projects."""
+    indexed = rebuild_search_index()
+    db.session.commit()
+    click.echo(f'Indexed {indexed} documents.')
+
+
+def rebuild_search_index() -> int:
+    search.clear(db.session)
+    indexed = 0
+    for (content_type, content_id), obj in load_content():
+        search.index_document(db.session, CONTENT_TYPE_KINDS[content_type], content_id, obj.search_fields)
+        indexed += 1
+    return indexed
+
+
+@content.command('export')
+@click.argument('output', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows fetched per round trip.')
+def export(output, chunk_size):
+    """Write all content to OUTPUT (default stdout) as JSON lines."""
+    exported = 0
+    for line in export_rows(db.session, dump_tables(db.metadata), chunk_size):
+        output.write(line)
+        exported += 1
+        if exported % chunk_size == 0:
+            click.echo(f'Exported {exported} rows...', err=True)
+    click.echo(f'Exported {exported} rows.', err=True)
+
+
+@content.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8'), default='-')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows inserted per statement.')
+@click.option('--replace', is_flag=True, help='Delete all existing content first.')
+def import_(source, chunk_size, replace):
+    """Load content exported with `flask content export` from SOURCE (default stdin), in one transaction."""
+    tables = dump_tables(db.metadata)
+    if replace:
+        clear_tables(db.session, tables)
+    elif any(db.session.execute(table.select().limit(1)).first() for table in tables):
+        raise click.ClickException('The database already has content, use --replace to overwrite it.')
+
+    imported = Counter()
+    try:
+        for table, count in import_rows(db.session, tables, source, chunk_size):
+            imported[table] += count
+            click.echo(f'{table}: {imported[table]} rows...', err=True)
+        if current_app.config['ENABLE_SEARCH']:
+            click.echo(f'Indexed {rebuild_search_index()} documents.', err=True)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Rows were inserted in bulk, so announce the change for every kind of content at once
+    content_changed.send(db.session, keys=frozenset(('blogpost', 'project', 'tag', 'technology', 'category', 'related', 'navbar')))
+    click.echo(f'Imported {imported.total()} rows into {len(imported)} tables.', err=True)
+
+
+@bp.cli.group()
+def assets():
+    """Static asset commands."""
+    pass
+
+
+@assets.command('compress')
+def compress():
+    """Write .br/.gz siblings of the compressible static files that changed since the last run."""
+    checked, written = 0, 0
+    for path in precompressed_files(current_app.static_folder, current_app.config['COMPRESS_MIN_SIZE']):
+        checked += 1
+        written += len(write_precompressed(path))
+    click.echo(f'Checked {checked} files, wrote {written} {"/".join(ENCODINGS)} files.')
+
+
+@assets.command('manifest')
+def manifest():
+    """Hash the static files and store the manifest, so workers start without hashing them."""
+    asset_manifest.digests = asset_manifest.build()
+    asset_manifest.save(current_app.config['ASSET_MANIFEST_PATH'])
+    click.echo(f'Hashed {len(asset_manifest.digests)} files.')
+
+
+@assets.command('images')
+@click.option('--force', is_flag=True, help='Rewrite every variant, even if it is up to date.')
+def images(force):
+    """Write the resized variants of every image shown by a post, project or technology."""
+    if not image_pipeline.enabled:
+        raise click.ClickException('No image format can be written, check IMAGE_FORMATS and IMAGE_WIDTHS.')
+    filenames = set(db.session.scalars(db.select(BlogPost.image)))
+    filenames.update(db.session.scalars(db.select(BlogPost.thumbnail)))
+    filenames.update(db.session.scalars(db.select(Project.image)))
+    filenames.update(db.session.scalars(db.select(Technology.image)))
+    written, failed = 0, 0
+    for filename, result in image_pipeline.generate(filenames, force):
+        written += bool(result)
+        failed += result is None
+        click.echo(f'{filename}: {"written" if result else "failed" if result is None else "up to date"}', err=True)
+    click.echo(f'Wrote variants of {written} images in {"/".join(image_pipeline.formats)}, {failed} failed.')
+
+
+@bp.cli.group()
+def site():
+    """Static site export commands."""
+    pass
+
+
+def page_paths(changed=None) -> set[str]:
+    """Paths of every post and project page, or only of the ones among changed (type, id) pairs"""
+    posts, projects = db.select(BlogPost.id, BlogPost.slug), db.select(Project.id, Project.slug)
+    if changed is not None:
+        posts = posts.where(BlogPost.id.in_([entity_id for content_type, entity_id in changed if content_type == ContentType.BLOG]))
+        projects = projects.where(Project.id.in_([entity_id for content_type, entity_id in changed if content_type == ContentType.PROJECT]))
+    with current_app.test_request_context():
+        paths = set()
+        paths.update(url_for('main.blogpost', post_id=post_id, post_slug=slug) for post_id, slug in db.session.execute(posts))
+        paths.update(url_for('main.project', project_id=project_id, project_slug=slug) for project_id, slug in db.session.execute(projects))
+    return paths
+
+
+def listing_paths() -> set[str]:
+    """Paths of the pages listing content: home, blog, portfolio, facet pages, feeds and sitemaps"""
+    index = facet_index.get()
+    with current_app.test_request_context():
+        paths = {'/', url_for('main.blog'), url_for('main.portfolio')}
+        paths.update(url_for(f'main.{facet}', title=title) for facet in FacetIndex.FACETS for title in index.values(facet))
+        paths.update(url_for(endpoint) for endpoint in ('feeds.atom', 'feeds.rss', 'feeds.json', 'feeds.sitemap', 'feeds.sitemap_pages'))
+        paths.update(url_for('feeds.sitemap_section', section=section, number=number)
+                     for section, number, _ in child_sitemaps(current_app.config['SITEMAP_SIZE']))
+    return paths
+
+
+@site.command('build')
+@click.option('--incremental', is_flag=True, help='Only re-render the pages depending on content changed since the last build.')
+def build(incremental):
+    """Render the public pages into SITE_PATH, for a web server to serve without the application."""
+    keys, journal = static_site.take_journal()
+    previous = static_site.load_manifest()
+    if incremental:
+        if not previous:
+            raise click.ClickException('Nothing was exported yet, run a full build first.')
+        manifest = dict(previous)
+        # Listings that did not exist at the last build, like the page of a new tag, are added too
+        paths = static_site.affected(previous, keys) | page_paths(changed_content(keys)) | (listing_paths() - previous.keys())
+    else:
+        manifest = {}
+        paths = page_paths() | listing_paths()
+
+    rendered = 0
+    for page in static_site.build(current_app._get_current_object(), paths, manifest):
+        if page.status == 200:
+            rendered += 1
+        else:
+            click.echo(f'{page.path}: {page.status}, removed', err=True)
+
+    # Pages that are gone, or that a full build no longer reaches, e.g. when pagination got shorter
+    dropped = previous.keys() - manifest.keys()
+    for path in dropped:
+        target = os.path.join(static_site.folder, page_file(path))
+        if os.path.exists(target):
+            os.remove(target)
+    static_site.save_manifest(manifest)
+    if journal is not None:
+        os.remove(journal)
+    click.echo(f'Rendered {rendered} pages, removed {len(dropped)}, {len(manifest)} pages exported.')
@@ -1,4 +1,4 @@
-from flask import render_template
+from flask import render_template, g
 
 from app import db
 from app.errors import bp
@@ -6,10 +6,12 @@ from app.errors import bp
 
 @bp.app_errorhandler(404)
 def not_found_error(error):
+    g.skip_database = True
     return render_template('errors/404.html'), 404
 
 
 @bp.app_errorhandler(500)
 def internal_error(error):
     db.session.rollback()
+    g.skip_database = True
     return render_template('errors/500.html'), 500
@@ -0,0 +1,217 @@
+"""
+Write-driven change notifications.
+
+Every flush records which content was touched as a set of keys ('project:3' for a single entity,
+'project' for anything that lists projects). Once the transaction commits, the keys are sent through
+the `content_changed` signal, so caches can invalidate exactly what was changed. Rolled back changes
+are never announced. The full-text search index is updated in the same transaction, just before it
+commits.
+
+The read side records the same keys: while a cacheable page renders, every entity loaded from the
+database or handed to a template adds its key to the page's tags, so a page is invalidated by exactly
+the rows it showed. Edits only announce the collection key ('project') when they can move an entity
+in or out of a listing, otherwise only the pages that showed the entity are dropped.
+"""
+from blinker import Namespace
+from flask import current_app, has_app_context, has_request_context, g, before_render_template
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import BlogPost, Project, ProjectFeature, ProjectSection, Tag, Technology, Category
+from app.models import RelatedContent, ContentType, related_graph, facet_index, load_content
+from app.utility import search
+from app.utility.similarity import similarity_index
+
+_signals = Namespace()
+
+content_changed = _signals.signal('content-changed')
+
+# Project attributes that show up in the navbar on every page
+NAVBAR_ATTRIBUTES = ('title', 'subtitle', 'deployment_url', 'visible')
+
+# Collection keys announced whenever content gains or loses a tag, technology or category
+FACET_KINDS = frozenset(('blogpost', 'project', 'tag', 'technology', 'category'))
+
+# Attributes deciding which listings show a post or project, and in which order
+LISTING_ATTRIBUTES = ('created_at', 'featured_order', 'category', 'tags', 'technologies')
+
+ENTITY_KINDS = {
+    BlogPost: 'blogpost',
+    Project: 'project',
+    Tag: 'tag',
+    Technology: 'technology',
+    Category: 'category',
+}
+
+CONTENT_TYPE_KINDS = {
+    ContentType.BLOG: 'blogpost',
+    ContentType.PROJECT: 'project',
+}
+
+KIND_CONTENT_TYPES = {kind: content_type for content_type, kind in CONTENT_TYPE_KINDS.items()}
+
+
+def cache_key(obj) -> str:
+    """The key of a single entity, e.g. 'blogpost:12'"""
+    return f'{ENTITY_KINDS[type(obj)]}:{obj.id}'
+
+
+def any_key(kind: str) -> str:
+    """The tag of a page showing every entity of a kind, like a feed, see `with_any_keys`"""
+    return f'{kind}:*'
+
+
+def with_any_keys(keys) -> set[str]:
+    """Changed keys together with the any_key of their kinds"""
+    return {*keys, *(any_key(key.partition(':')[0]) for key in keys)}
+
+
+def changed_content(keys) -> list[tuple[ContentType, int]]:
+    """The (type, id) of the blogposts and projects among changed keys"""
+    changed = []
+    for key in keys:
+        kind, _, entity_id = key.partition(':')
+        if entity_id and kind in KIND_CONTENT_TYPES:
+            changed.append((KIND_CONTENT_TYPES[kind], int(entity_id)))
+    return changed
+
+
+def _navbar_changed(project: Project, state: str) -> bool:
+    if state in ('new', 'deleted'):
+        return project.has_deployment
+    attrs = inspect(project).attrs
+    return any(attrs[name].history.has_changes() for name in NAVBAR_ATTRIBUTES)
+
+
+def _listing_changed(obj) -> bool:
+    if not isinstance(obj, (BlogPost, Project)):
+        return True
+    attrs = inspect(obj).attrs
+    return any(name in attrs and attrs[name].history.has_changes() for name in LISTING_ATTRIBUTES)
+
+
+def changed_keys(obj, state: str) -> set[str]:
+    """Keys invalidated by a new, dirty or deleted object"""
+    if isinstance(obj, (ProjectSection, ProjectFeature)):
+        return {f'project:{obj.project_id}'}
+    if isinstance(obj, RelatedContent):
+        return {
+            'related',
+            f'{CONTENT_TYPE_KINDS[obj.source_type]}:{obj.source_id}',
+            f'{CONTENT_TYPE_KINDS[obj.target_type]}:{obj.target_id}',
+        }
+    kind = ENTITY_KINDS.get(type(obj))
+    if kind is None:
+        return set()
+
+    keys = {f'{kind}:{obj.id}'}
+    if state != 'dirty' or _listing_changed(obj):
+        keys.add(kind)
+    if isinstance(obj, Project) and _navbar_changed(obj, state):
+        keys.add('navbar')
+    return keys
+
+
+def dependency_key(obj) -> str | None:
+    """The key a page showing obj depends on, if obj is content"""
+    if isinstance(obj, (ProjectSection, ProjectFeature)):
+        return f'project:{obj.project_id}'
+    kind = ENTITY_KINDS.get(type(obj))
+    return f'{kind}:{obj.id}' if kind is not None else None
+
+
+def _recording() -> bool:
+    # Pages being cached or exported collect their tags in g.cache_tags, nothing else records
+    return has_request_context() and 'cache_tags' in g
+
+
+def _record_loaded(obj, context) -> None:
+    if _recording():
+        g.cache_tags.add(dependency_key(obj))
+
+
+for _model in (*ENTITY_KINDS, ProjectSection, ProjectFeature):
+    event.listen(_model, 'load', _record_loaded)
+
+
+@before_render_template.connect
+def _record_template_context(sender, template, context, **extra) -> None:
+    # Entities that were not loaded in this request, e.g. kept by a process-wide cache
+    if not _recording():
+        return
+    for value in context.values():
+        for item in (value if isinstance(value, (list, tuple)) else (value,)):
+            key = dependency_key(item)
+            if key is not None:
+                g.cache_tags.add(key)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    # History is still available here, and new objects already have their ids
+    keys = session.info.setdefault('changed_keys', set())
+    for obj in session.new:
+        keys |= changed_keys(obj, 'new')
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            keys |= changed_keys(obj, 'dirty')
+    for obj in session.deleted:
+        keys |= changed_keys(obj, 'deleted')
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_changes(orm_execute_state):
+    # Bulk statements bypass the flush, e.g. the get-or-create inserts of tags and technologies
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        kind = ENTITY_KINDS.get(mapper.class_) if mapper is not None else None
+        if kind is not None:
+            orm_execute_state.session.info.setdefault('changed_keys', set()).add(kind)
+
+
+@event.listens_for(Session, 'before_commit')
+def _sync_search_index(session):
+    if not has_app_context() or not current_app.config['ENABLE_SEARCH']:
+        return
+    # Flush first, so the changes made since the last flush are collected as well
+    session.flush()
+    changed = changed_content(session.info.get('changed_keys', ()))
+    if not changed:
+        return
+    found = dict(load_content(set(changed)))
+    search.index_documents(session, [(CONTENT_TYPE_KINDS[key[0]], key[1], found[key].search_fields)
+                                     for key in changed if key in found])
+    search.remove_documents(session, [(CONTENT_TYPE_KINDS[key[0]], key[1]) for key in changed if key not in found])
+
+
+@event.listens_for(Session, 'after_commit')
+def _announce_changes(session):
+    keys = session.info.pop('changed_keys', None)
+    if keys:
+        content_changed.send(session, keys=frozenset(keys))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changes(session):
+    session.info.pop('changed_keys', None)
+
+
+@content_changed.connect
+def _refresh_related_graph(sender, keys: frozenset[str]) -> None:
+    if 'related' in keys:
+        related_graph.invalidate()
+
+
+@content_changed.connect
+def _refresh_facet_index(sender, keys: frozenset[str]) -> None:
+    # Which content has which facet only changes with a collection key, see LISTING_ATTRIBUTES
+    if keys & FACET_KINDS:
+        facet_index.invalidate()
+
+
+@content_changed.connect
+def _reindex_similarity(sender, keys: frozenset[str]) -> None:
+    # Only the changed posts and projects are re-indexed, on the next similarity query
+    changed = changed_content(keys)
+    if changed:
+        similarity_index.mark_dirty(changed)
@@ -0,0 +1,10 @@
+from flask import Blueprint
+
+bp = Blueprint('feeds', __name__)
+
+from app.feeds import routes
+from app.feeds.cache import feed_cache
+from app.feeds.sitemap import sitemap_cache
+
+bp.record_once(lambda state: feed_cache.init_app(state.app))
+bp.record_once(lambda state: sitemap_cache.init_app(state.app))
@@ -0,0 +1,156 @@
+"""
+Serialised feeds, built once per change of the blog posts.
+
+Every variant (format, tag, category) is serialised the first time it is requested, and kept together
+with its ETag and a compressed copy per encoding, so answering a feed reader is a dictionary lookup
+and a byte copy. Any write touching posts, tags or categories drops them all. The cache lives in
+every worker and the signal only reaches the one that handled the write, so the other workers
+rebuild a feed once it is older than FEED_CACHE_TTL.
+"""
+import threading
+from datetime import datetime, timezone
+from hashlib import sha256
+from time import time
+from typing import NamedTuple
+
+from flask import url_for
+from sqlalchemy.orm import load_only, selectinload, joinedload
+
+from app.events import content_changed
+from app.models import BlogPost, Tag, Category, ContentType
+from app.feeds.formats import Entry, Feed, FORMATS
+from app.utility.compression import compress
+
+# Changes that can alter any feed
+FEED_KINDS = frozenset(('blogpost', 'tag', 'category'))
+
+
+class FeedKey(NamedTuple):
+    format: str
+    tag: str | None
+    category: str | None
+
+
+class CachedFeed:
+    """A serialised feed or sitemap and its compressed copies, made on first use"""
+
+    def __init__(self, body: bytes, mimetype: str, updated: datetime | None) -> None:
+        self.body = body
+        self.mimetype = mimetype
+        self.updated = updated
+        self.etag = sha256(body).hexdigest()[:32]
+        self.built_at = time()
+        self._encoded: dict[str, bytes] = {}
+
+    def expired(self, ttl: float) -> bool:
+        """Whether it was built more than ttl seconds ago, a ttl of 0 never expires"""
+        return bool(ttl) and time() - self.built_at >= ttl
+
+    def encoded(self, encoding: str | None, level: int) -> bytes:
+        if encoding is None:
+            return self.body
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding, level)
+        return data
+
+
+def load_entries(tag: str | None, category: str | None, limit: int) -> list[Entry]:
+    """The newest posts, optionally only the ones with a tag or in a category"""
+    query = BlogPost.query.options(
+        load_only(BlogPost.id, BlogPost.slug, BlogPost.title, BlogPost.extract, BlogPost.created_at, BlogPost.updated_at),
+        selectinload(BlogPost.tags).load_only(Tag.title),
+        joinedload(BlogPost.category).load_only(Category.title),
+    )
+    if tag is not None:
+        query = query.filter(BlogPost.tags.any(Tag.title == tag))
+    if category is not None:
+        query = query.filter(BlogPost.category.has(Category.title == category))
+    posts = query.order_by(BlogPost.created_at.desc(), BlogPost.id.desc()).limit(limit).all()
+    return [Entry(
+        url=post.url,
+        title=post.title,
+        summary=post.extract,
+        published=post.created_at,
+        updated=post.updated_at,
+        tags=tuple(([post.category.title] if post.category else []) + [tag.title for tag in post.tags]),
+    ) for post in posts]
+
+
+def exists(tag: str | None, category: str | None) -> bool:
+    """Whether the tag and category of a feed exist, so made up ones are not cached"""
+    if tag is not None and Tag.query.filter_by(title=tag).first() is None:
+        return False
+    if category is not None and Category.query.filter_by(title=category, type=ContentType.BLOG).first() is None:
+        return False
+    return True
+
+
+class FeedCache:
+    """Serialised feeds by format and filter, dropped whenever posts change or once they are ttl old"""
+
+    def __init__(self) -> None:
+        self.size = 20
+        self.title = ''
+        self.ttl = 0
+        self.hits = 0
+        self.builds = 0
+        self._feeds: dict[FeedKey, CachedFeed] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        self.size = app.config['FEED_SIZE']
+        self.title = app.config['FEED_TITLE']
+        self.ttl = app.config['FEED_CACHE_TTL']
+
+    def get(self, key: FeedKey) -> CachedFeed | None:
+        """The cached feed, built if it is missing, None if its tag or category does not exist"""
+        feed = self._feeds.get(key)
+        if feed is not None and not feed.expired(self.ttl):
+            self.hits += 1
+            return feed
+        generation = self._generation
+        if not exists(key.tag, key.category):
+            # An expired feed of a tag or category that is gone is not kept around
+            self._feeds.pop(key, None)
+            return None
+        feed = self.build(key)
+        with self._lock:
+            self.builds += 1
+            # A feed built from posts that changed while it was being built is served, never kept
+            if generation == self._generation:
+                self._feeds[key] = feed
+        return feed
+
+    def build(self, key: FeedKey) -> CachedFeed:
+        entries = load_entries(key.tag, key.category, self.size)
+        title = ' - '.join(filter(None, (self.title, key.category, key.tag and f'#{key.tag}')))
+        updated = max((entry.updated for entry in entries), default=datetime.now(timezone.utc))
+        filters = {name: value for name, value in (('tag', key.tag), ('category', key.category)) if value is not None}
+        feed = Feed(
+            title=title,
+            home_url=url_for('main.blog', _external=True),
+            feed_url=url_for(f'feeds.{key.format}', **filters, _external=True),
+            updated=updated,
+            entries=entries,
+        )
+        mimetype, serialise = FORMATS[key.format]
+        return CachedFeed(serialise(feed), mimetype, updated)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._feeds.clear()
+
+    def stats(self) -> dict:
+        return {'size': len(self._feeds), 'hits': self.hits, 'builds': self.builds}
+
+
+feed_cache = FeedCache()
+
+
+@content_changed.connect
+def _on_content_changed(sender, keys: frozenset[str]) -> None:
+    if any(key.partition(':')[0] in FEED_KINDS for key in keys):
+        feed_cache.clear()
@@ -0,0 +1,101 @@
+"""
+Atom, RSS 2.0 and JSON Feed serialisation of a list of blog posts.
+"""
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Callable, NamedTuple
+from xml.etree import ElementTree as ET
+
+
+class Entry(NamedTuple):
+    url: str
+    title: str
+    summary: str
+    published: datetime
+    updated: datetime
+    tags: tuple[str, ...]
+
+
+class Feed(NamedTuple):
+    title: str
+    home_url: str
+    feed_url: str
+    updated: datetime
+    entries: list[Entry]
+
+
+def utc(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _element(parent, tag: str, text: str | None = None, **attributes) -> ET.Element:
+    element = ET.SubElement(parent, tag, attributes)
+    element.text = text
+    return element
+
+
+def atom(feed: Feed) -> bytes:
+    root = ET.Element('feed', xmlns='http://www.w3.org/2005/Atom')
+    _element(root, 'title', feed.title)
+    _element(root, 'id', feed.home_url)
+    _element(root, 'link', href=feed.home_url)
+    _element(root, 'link', rel='self', href=feed.feed_url)
+    _element(root, 'updated', utc(feed.updated).isoformat())
+    for entry in feed.entries:
+        item = _element(root, 'entry')
+        _element(item, 'title', entry.title)
+        _element(item, 'id', entry.url)
+        _element(item, 'link', href=entry.url)
+        _element(item, 'published', utc(entry.published).isoformat())
+        _element(item, 'updated', utc(entry.updated).isoformat())
+        _element(item, 'summary', entry.summary)
+        for tag in entry.tags:
+            _element(item, 'category', term=tag)
+    return ET.tostring(root, encoding='utf-8', xml_declaration=True)
+
+
+def rss(feed: Feed) -> bytes:
+    root = ET.Element('rss', version='2.0')
+    channel = _element(root, 'channel')
+    _element(channel, 'title', feed.title)
+    _element(channel, 'link', feed.home_url)
+    _element(channel, 'description', feed.title)
+    _element(channel, 'lastBuildDate', format_datetime(utc(feed.updated)))
+    for entry in feed.entries:
+        item = _element(channel, 'item')
+        _element(item, 'title', entry.title)
+        _element(item, 'link', entry.url)
+        _element(item, 'guid', entry.url, isPermaLink='true')
+        _element(item, 'pubDate', format_datetime(utc(entry.published)))
+        _element(item, 'description', entry.summary)
+        for tag in entry.tags:
+            _element(item, 'category', tag)
+    return ET.tostring(root, encoding='utf-8', xml_declaration=True)
+
+
+def json_feed(feed: Feed) -> bytes:
+    return json.dumps({
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': feed.title,
+        'home_page_url': feed.home_url,
+        'feed_url': feed.feed_url,
+        'items': [{
+            'id': entry.url,
+            'url': entry.url,
+            'title': entry.title,
+            'summary': entry.summary,
+            'date_published': utc(entry.published).isoformat(),
+            'date_modified': utc(entry.updated).isoformat(),
+            'tags': list(entry.tags),
+        } for entry in feed.entries],
+    }, ensure_ascii=False).encode('utf-8')
+
+
+# Format name: (mimetype, serialiser)
+FORMATS: dict[str, tuple[str, Callable[[Feed], bytes]]] = {
+    'atom': ('application/atom+xml', atom),
+    'rss': ('application/rss+xml', rss),
+    'json': ('application/feed+json', json_feed),
+}
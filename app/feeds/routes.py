@@ -0,0 +1,68 @@
+from flask import request, current_app, abort
+
+from app.events import any_key
+from app.feeds import bp
+from app.feeds.cache import feed_cache, FeedKey, CachedFeed, FEED_KINDS
+from app.feeds.formats import utc
+from app.feeds.sitemap import sitemap_cache, SITEMAP_KINDS
+from app.utility.cache import page_cache
+from app.utility.compression import negotiate
+
+
+def respond(cached: CachedFeed | None):
+    """Answer with the cached bytes, or a 304 if the client has them already"""
+    if cached is None:
+        abort(404)
+    # Compressed here from the cache, so the compression after_request leaves the response alone
+    encoding = negotiate(request.accept_encodings)
+    response = current_app.response_class(cached.encoded(encoding, current_app.config['COMPRESS_LEVEL']), mimetype=cached.mimetype)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f'{cached.etag}-{encoding}' if encoding else cached.etag)
+    if cached.updated is not None:
+        response.last_modified = utc(cached.updated)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
+def serve(format: str):
+    # A static export re-renders the feeds whenever any post, tag or category changed
+    page_cache.tag(*map(any_key, FEED_KINDS))
+    return respond(feed_cache.get(FeedKey(format, request.args.get('tag') or None, request.args.get('category') or None)))
+
+
+@bp.route('/feed.atom', methods=['GET'])
+def atom():
+    return serve('atom')
+
+
+@bp.route('/feed.xml', methods=['GET'])
+def rss():
+    return serve('rss')
+
+
+@bp.route('/feed.json', methods=['GET'])
+def json():
+    return serve('json')
+
+
+def serve_sitemap(name: str):
+    # Every sitemap carries lastmods, so a static export re-renders them whenever content changed
+    page_cache.tag(*map(any_key, SITEMAP_KINDS))
+    return respond(sitemap_cache.get(name))
+
+
+@bp.route('/sitemap.xml', methods=['GET'])
+def sitemap():
+    return serve_sitemap('index')
+
+
+@bp.route('/sitemap-pages.xml', methods=['GET'])
+def sitemap_pages():
+    return serve_sitemap('pages')
+
+
+@bp.route('/sitemap-<section>-<int:number>.xml', methods=['GET'])
+def sitemap_section(section, number):
+    return serve_sitemap(f'{section}-{number}')
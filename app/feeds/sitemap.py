@@ -0,0 +1,175 @@
+"""
+Sitemaps for crawlers.
+
+/sitemap.xml is an index of child sitemaps, one for the listing pages and then the posts and the
+projects by id range: child n of a section holds the ids from (n - 1) * SITEMAP_SIZE + 1 up to
+n * SITEMAP_SIZE. A URL stays in the same child when other rows are deleted, and a child is read
+with a range on the primary key instead of an OFFSET that walks every row before it. Every URL has
+its `updated_at` as lastmod, so crawlers only refetch what changed instead of walking the listings.
+Rows are streamed with yield_per while a sitemap is serialised, and the result is kept until posts
+or projects change, or at most SITEMAP_CACHE_TTL in the workers the change signal did not reach.
+"""
+import threading
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Iterable, Iterator, NamedTuple
+from xml.sax.saxutils import escape
+
+from flask import request, url_for
+from sqlalchemy import select, func
+
+from app import db
+from app.events import content_changed
+from app.models import BlogPost, Project
+from app.feeds.cache import CachedFeed
+from app.feeds.formats import utc
+
+MIMETYPE = 'application/xml'
+
+# Rows fetched per round trip while streaming
+YIELD_PER = 1000
+
+# Changes that can alter any sitemap
+SITEMAP_KINDS = frozenset(('blogpost', 'project'))
+
+
+class Section(NamedTuple):
+    model: type
+    url: Callable[[int, str], str]
+
+
+SECTIONS = {
+    'posts': Section(BlogPost, lambda id, slug: url_for('main.blogpost', post_id=id, post_slug=slug, _external=True)),
+    'projects': Section(Project, lambda id, slug: url_for('main.project', project_id=id, project_slug=slug, _external=True)),
+}
+
+
+def _lastmod(value: datetime | None) -> str:
+    return f'<lastmod>{utc(value).isoformat(timespec="seconds")}</lastmod>' if value else ''
+
+
+def urlset(urls: Iterable[tuple[str, datetime | None]]) -> Iterator[str]:
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for loc, lastmod in urls:
+        yield f'<url><loc>{escape(loc)}</loc>{_lastmod(lastmod)}</url>\n'
+    yield '</urlset>\n'
+
+
+def sitemap_index(sitemaps: Iterable[tuple[str, datetime | None]]) -> Iterator[str]:
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for loc, lastmod in sitemaps:
+        yield f'<sitemap><loc>{escape(loc)}</loc>{_lastmod(lastmod)}</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def chunk_lastmods(model, size: int) -> list[tuple[int, datetime | None]]:
+    """(number, newest updated_at) of every id range of `size` ids that has rows, numbered from 1"""
+    number = (model.id - 1) // size + 1
+    query = select(number, func.max(model.updated_at)).group_by(number).order_by(number)
+    return [(int(chunk), lastmod) for chunk, lastmod in db.session.execute(query)]
+
+
+def child_sitemaps(size: int) -> Iterator[tuple[str, int, datetime | None]]:
+    """(section, number, lastmod) of every child sitemap of the posts and projects"""
+    for section_name, section in SECTIONS.items():
+        for number, lastmod in chunk_lastmods(section.model, size):
+            yield section_name, number, lastmod
+
+
+def section_urls(section: Section, number: int, size: int) -> Iterator[tuple[str, datetime | None]]:
+    """URLs of the id range of one chunk of a section, chunks are numbered from 1"""
+    model = section.model
+    first = (number - 1) * size + 1
+    query = (select(model.id, model.slug, model.updated_at)
+             .where(model.id >= first, model.id < first + size)
+             .order_by(model.id))
+    for row_id, slug, updated_at in db.session.execute(query, execution_options={'yield_per': YIELD_PER}):
+        yield section.url(row_id, slug), updated_at
+
+
+def page_urls() -> list[tuple[str, datetime | None]]:
+    """The listing pages, last modified when the newest of the content they list was"""
+    posts, projects = db.session.execute(select(
+        select(func.max(BlogPost.updated_at)).scalar_subquery(),
+        select(func.max(Project.updated_at)).scalar_subquery(),
+    )).one()
+    return [
+        (request.url_root, max(filter(None, (posts, projects)), default=None)),
+        (url_for('main.blog', _external=True), posts),
+        (url_for('main.portfolio', _external=True), projects),
+    ]
+
+
+class SitemapCache:
+    """Serialised sitemaps by name, 'index', 'pages' or '<section>-<number>', dropped when content changes or ttl old"""
+
+    def __init__(self) -> None:
+        self.size = 50000
+        self.ttl = 0
+        self.hits = 0
+        self.builds = 0
+        self._sitemaps: dict[str, CachedFeed] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        self.size = app.config['SITEMAP_SIZE']
+        self.ttl = app.config['SITEMAP_CACHE_TTL']
+
+    def get(self, name: str) -> CachedFeed | None:
+        """The cached sitemap, built if it is missing, None if there is no such sitemap"""
+        sitemap = self._sitemaps.get(name)
+        if sitemap is not None and not sitemap.expired(self.ttl):
+            self.hits += 1
+            return sitemap
+        generation = self._generation
+        sitemap = self.build(name)
+        if sitemap is None:
+            # An expired child sitemap whose rows are all gone is not kept around
+            self._sitemaps.pop(name, None)
+            return None
+        with self._lock:
+            self.builds += 1
+            if generation == self._generation:
+                self._sitemaps[name] = sitemap
+        return sitemap
+
+    def build(self, name: str) -> CachedFeed | None:
+        if name == 'index':
+            sitemaps = [(url_for('feeds.sitemap_pages', _external=True), None)]
+            sitemaps.extend((url_for('feeds.sitemap_section', section=section_name, number=number, _external=True), lastmod)
+                            for section_name, number, lastmod in child_sitemaps(self.size))
+            return self._serialise(sitemap_index(sitemaps))
+        if name == 'pages':
+            return self._serialise(urlset(page_urls()))
+
+        section_name, _, number = name.rpartition('-')
+        section = SECTIONS.get(section_name)
+        if section is None or not number.isdigit() or int(number) < 1:
+            return None
+        urls = section_urls(section, int(number), self.size)
+        first = next(urls, None)
+        if first is None:
+            return None
+        return self._serialise(urlset(chain((first,), urls)))
+
+    @staticmethod
+    def _serialise(chunks: Iterable[str]) -> CachedFeed:
+        return CachedFeed(''.join(chunks).encode('utf-8'), MIMETYPE, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._sitemaps.clear()
+
+    def stats(self) -> dict:
+        return {'size': len(self._sitemaps), 'hits': self.hits, 'builds': self.builds}
+
+
+sitemap_cache = SitemapCache()
+
+
+@content_changed.connect
+def _on_content_changed(sender, keys: frozenset[str]) -> None:
+    if any(key.partition(':')[0] in SITEMAP_KINDS for key in keys):
+        sitemap_cache.clear()
@@ -2,4 +2,6 @@ from flask import Blueprint
 
 bp = Blueprint('main', __name__)
 
-from app.main import routes
+from app.main import routes, navbar
+
+bp.record_once(lambda state: navbar.init_app(state.app))
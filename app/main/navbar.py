@@ -0,0 +1,31 @@
+from typing import NamedTuple
+
+from app.events import content_changed
+from app.models import Project
+from app.utility.cache import Snapshot
+
+
+class NavbarLink(NamedTuple):
+    """Plain copy of a deployed project, safe to share between requests"""
+    id: int
+    title: str
+    subtitle: str
+    deployment_url: str
+
+
+def load_navbar() -> list[NavbarLink]:
+    """Get the deployed projects shown in the navbar"""
+    return [NavbarLink(p.id, p.title, p.subtitle, p.deployment_url) for p in Project.get_deployed()] # type: ignore[arg-type]
+
+
+navbar = Snapshot(load_navbar)
+
+
+def init_app(app) -> None:
+    navbar.ttl = app.config['NAVBAR_CACHE_TTL']
+
+
+@content_changed.connect
+def _on_content_changed(sender, keys: frozenset[str]) -> None:
+    if 'navbar' in keys:
+        navbar.invalidate()
@@ -1,44 +1,150 @@
-from flask import render_template, render_template_string
+from flask import render_template, request, current_app, g, make_response, url_for, abort
 from app.main import bp
-from app.models import BlogPost, Project
-from app import db
-from markupsafe import Markup
-from markdown import markdown
+from app.main.navbar import navbar
+from app.models import BlogPost, Project, RelatedContent, ContentType, FacetIndex, search_content, facet_index, load_cards, content_validators
+from app.events import cache_key
+from app.utility.cache import page_cache
+from app.utility.conditional import conditional_get
+
+def paginated(rendered, endpoint: str, next_cursor: str | None, **values):
+    """Response advertising the next page in a Link header"""
+    response = make_response(rendered)
+    if next_cursor:
+        response.headers['Link'] = f'<{url_for(endpoint, cursor=next_cursor, **values)}>; rel="next"'
+    return response
+
+def all_content(**kwargs):
+    return content_validators()
+
+def all_posts(**kwargs):
+    return content_validators(projects=False)
+
+def all_projects(**kwargs):
+    return content_validators(posts=False)
+
+def with_related(content_type: ContentType, content_id: int):
+    """Validators of a detail page, which shows the entity and the content related to it"""
+    keys = [(content_type, content_id), *RelatedContent.neighbours(content_type, content_id)]
+    return content_validators(posts=[i for t, i in keys if t == ContentType.BLOG],
+                              projects=[i for t, i in keys if t == ContentType.PROJECT])
+
+def post_and_related(post_id, post_slug):
+    return with_related(ContentType.BLOG, post_id)
+
+def project_and_related(project_id, project_slug):
+    return with_related(ContentType.PROJECT, project_id)
 
 @bp.app_context_processor
 def inject_global_vars():
-    """Make variables available to all templates"""
+    """Make variables available to all templates, error pages never touch the database"""
     return {
-        'navbar_projects': Project.get_deployed()
+        'navbar_projects': navbar.peek([]) if g.get('skip_database') else navbar.get()
     }
 
 @bp.route('/', methods=['GET'])
 @bp.route('/index', methods=['GET'])
+@conditional_get.validated(all_content)
+@page_cache.cached
 def index():
-    deployed_projects = Project.get_deployed()
+    page_cache.tag('blogpost', 'project', 'technology')
+    deployed_projects = navbar.get()
     latest_posts = BlogPost.get_recent()
     featured_projects = Project.get_featured()[:3]
     return render_template('index.html', deployed_projects=deployed_projects, latest_posts=latest_posts, featured_projects=featured_projects, title='Home')
 
 @bp.route('/blog', methods=['GET'])
+@conditional_get.validated(all_posts)
+@page_cache.cached
 def blog():
-    posts = BlogPost.query.all()
-    return render_template('blog.html', posts=posts, title='Blog')
+    page_cache.tag('blogpost')
+    posts, next_cursor = BlogPost.get_page(current_app.config['BLOG_PAGE_SIZE'], request.args.get('cursor'))
+    return paginated(render_template('blog.html', posts=posts, next_cursor=next_cursor, title='Blog'), 'main.blog', next_cursor)
 
 @bp.route('/blog/<int:post_id>-<post_slug>', methods=['GET'])
+@conditional_get.validated(post_and_related)
+@page_cache.cached
 def blogpost(post_id, post_slug):
-    post_content = db.first_or_404(db.select(BlogPost).filter_by(id=post_id))
-    html_content = markdown(post_content.body)
-    post_body = Markup(render_template_string(html_content))
-    print(post_body)
-    return render_template('blogpost.html', body=post_body, post=post_content, title='Blog')
+    page_cache.tag(f'blogpost:{post_id}')
+    post_content = BlogPost.for_detail().filter_by(id=post_id).first_or_404()
+    page_cache.tag(*(cache_key(item.object) for item in post_content.related_content))
+    return render_template('blogpost.html', body=post_content.html, post=post_content, title='Blog')
 
 @bp.route('/portfolio', methods=['GET'])
+@conditional_get.validated(all_projects)
+@page_cache.cached
 def portfolio():
-    projects = Project.query.all()
-    return render_template('portfolio.html',projects=projects, title='Portfolio')
+    page_cache.tag('project', 'technology')
+    projects, next_cursor = Project.get_page(current_app.config['PORTFOLIO_PAGE_SIZE'], request.args.get('cursor'))
+    return paginated(render_template('portfolio.html', projects=projects, next_cursor=next_cursor, title='Portfolio'), 'main.portfolio', next_cursor)
 
 @bp.route('/portfolio/<int:project_id>-<project_slug>', methods=['GET'])
+@conditional_get.validated(project_and_related)
+@page_cache.cached
 def project(project_id, project_slug):
-    project_data = Project.query.filter_by(id=project_id).first_or_404()
+    page_cache.tag(f'project:{project_id}')
+    project_data = Project.for_detail().filter_by(id=project_id).first_or_404()
+    page_cache.tag(*(cache_key(item.object) for item in project_data.related_content))
     return render_template('project.html', project=project_data, title='Portfolio')
+
+# Facet values offered for narrowing down a selection, per facet
+FACET_LINKS = 10
+
+def facet_page(filters: dict[str, list[str]]):
+    """Content having every facet value, newest first, answered from the in-memory facet index"""
+    page_cache.tag('blogpost', 'project', 'tag', 'technology', 'category')
+    for facet in FacetIndex.FACETS:
+        filters[facet] = list(dict.fromkeys(filters.get(facet, []) + request.args.getlist(facet)))
+    filters = {facet: titles for facet, titles in filters.items() if titles}
+    index = facet_index.get()
+    if not filters or any(title not in index.values(facet) for facet, titles in filters.items() for title in titles):
+        abort(404)
+
+    selection = index.select(filters)
+    keys, next_cursor = index.page(selection, current_app.config['FACET_PAGE_SIZE'], request.args.get('cursor'))
+    found = load_cards(keys)
+    items = [(content_type.value, found[(content_type, content_id)]) for content_type, content_id in keys
+             if (content_type, content_id) in found]
+    title = ' + '.join(title for titles in filters.values() for title in titles)
+    # Links to drop one of the selected values, or to narrow the selection down by one more
+    selected = []
+    for facet, titles in filters.items():
+        for value in titles:
+            remaining = {other: [t for t in values if (other, t) != (facet, value)] for other, values in filters.items()}
+            selected.append((facet, value, url_for('main.facets', **remaining) if sum(map(len, remaining.values())) else None))
+    refine = {facet: [(value, count, url_for('main.facets', **{**filters, facet: filters.get(facet, []) + [value]}))
+                      for value, count in counts if value not in filters.get(facet, ())][:FACET_LINKS]
+              for facet, counts in index.counts(selection).items()}
+    rendered = render_template('facets.html', selected=selected, refine=refine, items=items, total=selection.bit_count(),
+                               filters=filters, next_cursor=next_cursor, title=title)
+    return paginated(rendered, 'main.facets', next_cursor, **filters)
+
+@bp.route('/facets', methods=['GET'])
+@conditional_get.validated(all_content)
+@page_cache.cached
+def facets():
+    return facet_page({})
+
+@bp.route('/tag/<title>', methods=['GET'])
+@conditional_get.validated(all_content)
+@page_cache.cached
+def tag(title):
+    return facet_page({'tag': [title]})
+
+@bp.route('/technology/<title>', methods=['GET'])
+@conditional_get.validated(all_content)
+@page_cache.cached
+def technology(title):
+    return facet_page({'technology': [title]})
+
+@bp.route('/category/<title>', methods=['GET'])
+@conditional_get.validated(all_content)
+@page_cache.cached
+def category(title):
+    return facet_page({'category': [title]})
+
+@bp.route('/search', methods=['GET'])
+@conditional_get.validated(all_content)
+def search():
+    query = request.args.get('q', '').strip()
+    results, next_cursor = search_content(query, current_app.config['SEARCH_PAGE_SIZE'], request.args.get('cursor'))
+    return render_template('search.html', query=query, results=results, next_cursor=next_cursor, title='Search')
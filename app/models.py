@@ -1,13 +1,31 @@
 from app import db
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, selectinload, joinedload, load_only, Session
 from sqlalchemy import Integer, String, Text, DateTime, ForeignKey, Column, Table, Boolean
 from sqlalchemy import Enum as SQLEnum
-from flask import url_for
+from sqlalchemy import event, tuple_, insert, select, update, func
+from flask import url_for, has_app_context
+from markupsafe import Markup
 from enum import Enum
 from markdown import markdown
 from dataclasses import dataclass
+from functools import cached_property
+from hashlib import sha256
+from bisect import bisect_left
+
+from app.utility.jinja2 import jinja_markdown, forget_content
+from app.utility.cache import Snapshot, page_cache
+from app.utility.similarity import similarity_index
+from app.utility import search
+from app.utility.pagination import encode_cursor, decode_cursor
+from app.utility.assets import asset_url
+from flask import current_app
+
+
+def content_hash(content: str | None) -> str:
+    """Hash of the raw Markdown source, used to detect stale pre-rendered HTML"""
+    return sha256((content or "").encode("utf-8")).hexdigest()
 
 
 class DevelopmentStatus(str, Enum):
@@ -123,6 +141,8 @@ class RelatedContent(db.Model):
     __table_args__ = (
         db.UniqueConstraint("source_type", "source_id", "target_type", "target_id", name="uq_related_content"),
         db.CheckConstraint("NOT (source_id = target_id AND source_type = target_type)", name="ck_no_self_link"),
+        # The unique constraint covers lookups by source, this covers the reverse direction
+        db.Index("ix_related_content_target", "target_type", "target_id"),
     )
 
     if TYPE_CHECKING:
@@ -151,7 +171,95 @@ class RelatedContent(db.Model):
 
     def __str__(self) -> str:
         return f'This entry represents the relationship between: {self.source_type} - {self.source_id} and {self.target_type} - {self.target_id}'
+
+    @classmethod
+    def neighbours(cls, content_type: ContentType, content_id: int, limit: int = 5) -> list[tuple[ContentType, int]]:
+        """
+        Keys of the content linked to an entity, in either direction, without loading any of it.
+        Links come from the in-memory related graph, topped up with similar content when there are few.
+        """
+        neighbours = related_graph.get().neighbours(content_type, content_id)
+        if len(neighbours) < limit and current_app.config['ENABLE_SIMILARITY']:
+            # Fill up sparse manual links with the most similar content
+            neighbours += [key for key in similar_content(content_type, content_id, limit) if key not in neighbours]
+        return neighbours
+
+    @classmethod
+    def resolve(cls, content_type: ContentType, content_id: int, limit: int = 5) -> list[RelatedItem]:
+        """
+        Get the content linked to an entity, in either direction.
+        The content itself is loaded with one IN query per content type.
+        """
+        neighbours = cls.neighbours(content_type, content_id, limit)
+        found = load_cards(neighbours)
+        items = [RelatedItem(t.value, found[(t, i)]) for t, i in neighbours if (t, i) in found]
+        return items[:limit]
     
+class RelatedGraph:
+    """
+    Symmetric adjacency lists of all RelatedContent links, keyed by (type, id).
+    Looking up the neighbours of an entity is O(degree).
+    """
+
+    def __init__(self, links) -> None:
+        self._adjacency: dict[tuple[ContentType, int], list[tuple[ContentType, int]]] = {}
+        for source_type, source_id, target_type, target_id in links:
+            self._adjacency.setdefault((source_type, source_id), []).append((target_type, target_id))
+            self._adjacency.setdefault((target_type, target_id), []).append((source_type, source_id))
+
+    @classmethod
+    def load(cls) -> "RelatedGraph":
+        """Build the graph from a single scan of the related_content table"""
+        rows = db.session.execute(
+            db.select(RelatedContent.source_type, RelatedContent.source_id, RelatedContent.target_type, RelatedContent.target_id)
+            .order_by(RelatedContent.id)
+        )
+        return cls(rows)
+
+    def neighbours(self, content_type: ContentType, content_id: int) -> list[tuple[ContentType, int]]:
+        """Content directly linked to an entity, in the order the links were made"""
+        return list(self._adjacency.get((content_type, content_id), ()))
+
+    def __len__(self) -> int:
+        return len(self._adjacency)
+
+
+related_graph = Snapshot(RelatedGraph.load)
+
+
+class DeletedContent(db.Model):
+    """
+    Record of a deleted blogpost or project, so the pages that showed it can tell they changed.
+    Attributes:
+        id (int): Primary key, auto-incrementing ID
+        content_type (ContentType): ContentType is an Enum
+        content_id (int): The ID the deleted content had
+        deleted_at (datetime): UTC timestamp of the deletion (auto-set)
+    """
+    __tablename__ = 'deleted_content'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    content_type: Mapped[ContentType] = mapped_column(SQLEnum(ContentType), nullable=False)
+    content_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        index=True,
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+    if TYPE_CHECKING:
+        def __init__(
+            self,
+            *,
+            content_type: ContentType,
+            content_id: int,
+            deleted_at: datetime | None = None,
+        ) -> None: ...
+
+    def __repr__(self) -> str:
+        return f'<Deleted Content: {self.content_type} - {self.content_id}>'
+
+
 class Category(db.Model):
     """
     Category model for categorizing blogposts and projects.
@@ -214,6 +322,15 @@ class Tag(db.Model):
     def __str__(self) -> str:
         return f'Homepage Tag: {self.title}'
 
+    @classmethod
+    def resolve_titles(cls, titles: list[str]) -> dict[str, "Tag"]:
+        """The tags with these titles by title, creating the missing ones, in three queries at most"""
+        return get_or_create_by_title(cls, {title: {'title': title} for title in titles})
+
+    @classmethod
+    def get_or_create_many(cls, titles: list[str]) -> list["Tag"]:
+        return list(dict.fromkeys(cls.resolve_titles(titles).values()))
+
 
 class Technology(db.Model):
     """
@@ -253,10 +370,33 @@ class Technology(db.Model):
     def __str__(self) -> str:
         return f'Homepage Technology: {self.type} - {self.title}'
 
+    @classmethod
+    def resolve_titles(cls, items: list[str | dict]) -> dict[str, "Technology"]:
+        """
+        Technologies by title, creating the missing ones that come with their type and order.
+        Unknown technologies given by title alone are skipped.
+        """
+        rows: dict[str, dict | None] = {}
+        for item in items:
+            if isinstance(item, str):
+                rows.setdefault(item, None)
+            else:
+                rows[item['title']] = {
+                    'title': item['title'],
+                    'type': item['type'],
+                    'image': item.get('image'),
+                    'order': item['order'],
+                }
+        return get_or_create_by_title(cls, rows)
+
+    @classmethod
+    def get_or_create_many(cls, items: list[str | dict]) -> list["Technology"]:
+        return list(dict.fromkeys(cls.resolve_titles(items).values()))
+
     @property
     def image_url(self) -> str:
         """Generate full URL for the image attached to this Technology"""
-        return url_for('static', filename=self.image, _external=True)
+        return asset_url(self.image, _external=True)
 
 
 class ProjectSection(db.Model):
@@ -268,6 +408,8 @@ class ProjectSection(db.Model):
         title (str | None): Section title, max 64 characters
         type (TechnologyType): TechnologyType is an Enum
         body (str): Full post content formatted with Markdown (unlimited text)
+        body_html (str | None): Pre-rendered HTML of the body, filled in at write time
+        body_hash (str | None): SHA-256 of the body the stored HTML was rendered from
         icon (str | None): Name of fontawesome v5.3.1 icon, max 128 characters
         order (int): Interger determining the order of entry
     """
@@ -280,6 +422,8 @@ class ProjectSection(db.Model):
         nullable=False,
     )
     body: Mapped[str] = mapped_column(Text, nullable=False)
+    body_html: Mapped[str | None] = mapped_column(Text, nullable=True)
+    body_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     icon: Mapped[str | None] = mapped_column(String(128), nullable=True)
     order: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
@@ -306,6 +450,22 @@ class ProjectSection(db.Model):
     def render_html(self) -> str:
         return markdown(self.body or "")
 
+    def render_body(self, force: bool = False) -> bool:
+        """Store the fully rendered body (Markdown + Jinja), returns True if it had to be re-rendered"""
+        body_hash = content_hash(self.body)
+        if not force and self.body_html is not None and self.body_hash == body_hash:
+            return False
+        self.body_html = str(jinja_markdown(self.render_html()))
+        self.body_hash = body_hash
+        return True
+
+    @property
+    def html(self) -> Markup:
+        """The rendered body, only falls back to rendering when nothing has been stored yet"""
+        if self.body_html is None:
+            return jinja_markdown(self.render_html())
+        return Markup(self.body_html)
+
 class ProjectFeature(db.Model):
     """
     Model for adding features to projects and show their status.
@@ -366,6 +526,8 @@ class BlogPost(db.Model):
         title (str): Post title, max 128 characters
         subtitle (str | None): Post subtitle, max 128 characters
         body (str): Full post content formatted with Markdown (unlimited text)
+        body_html (str | None): Pre-rendered HTML of the body, filled in at write time
+        body_hash (str | None): SHA-256 of the body the stored HTML was rendered from
         extract (str): Short excerpt/summary, max 512 characters
         image (str): Path to main post image, max 128 characters
         thumbnail (str | None): Path to thumbnail image, max 128 characters
@@ -389,6 +551,8 @@ class BlogPost(db.Model):
     title: Mapped[str] = mapped_column(String(128), nullable=False, unique=True)
     subtitle: Mapped[str | None] = mapped_column(String(128), nullable=True)
     body: Mapped[str] = mapped_column(Text, nullable=False)
+    body_html: Mapped[str | None] = mapped_column(Text, nullable=True)
+    body_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     extract: Mapped[str] = mapped_column(String(512), nullable=False)
     image: Mapped[str] = mapped_column(String(128), nullable=False)
     thumbnail: Mapped[str | None] = mapped_column(String(128), nullable=True)
@@ -399,6 +563,22 @@ class BlogPost(db.Model):
     tags: Mapped[list["Tag"]] = relationship("Tag", secondary=blogpost_tags)
     technologies: Mapped[list["Technology"]] = relationship("Technology", secondary=blogpost_technologies)
 
+    related_sources = db.relationship(
+        "RelatedContent",
+        primaryjoin="and_(foreign(RelatedContent.source_id) == BlogPost.id, RelatedContent.source_type == 'blogpost')",
+        viewonly=True,
+        overlaps="related_sources",
+        lazy="select",
+    )
+
+    related_targets = db.relationship(
+        "RelatedContent",
+        primaryjoin="and_(foreign(RelatedContent.target_id) == BlogPost.id, RelatedContent.target_type == 'blogpost')",
+        viewonly=True,
+        overlaps="related_targets",
+        lazy="select",
+    )
+
     if TYPE_CHECKING:
         def __init__(
             self, 
@@ -426,6 +606,22 @@ class BlogPost(db.Model):
         """Get the markdown body as html rendered"""
         return markdown(self.body or "")
 
+    def render_body(self, force: bool = False) -> bool:
+        """Store the fully rendered body (Markdown + Jinja), returns True if it had to be re-rendered"""
+        body_hash = content_hash(self.body)
+        if not force and self.body_html is not None and self.body_hash == body_hash:
+            return False
+        self.body_html = str(jinja_markdown(self.render_html()))
+        self.body_hash = body_hash
+        return True
+
+    @property
+    def html(self) -> Markup:
+        """The rendered body, only falls back to rendering when nothing has been stored yet"""
+        if self.body_html is None:
+            return jinja_markdown(self.render_html())
+        return Markup(self.body_html)
+
     @property
     def url(self) -> str:
         """Generate full URL for this post"""
@@ -434,12 +630,12 @@ class BlogPost(db.Model):
     @property
     def image_url(self) -> str:
         """Generate full URL for the image attached to this post"""
-        return url_for('static', filename=self.image, _external=True)
+        return asset_url(self.image, _external=True)
 
     @property
     def thumbnail_url(self) -> str:
         """Generate full URL for the thumbnail attached to this post"""
-        return url_for('static', filename=self.thumbnail, _external=True)
+        return asset_url(self.thumbnail, _external=True)
 
     @property
     def formatted_created_at(self) -> str:
@@ -451,10 +647,55 @@ class BlogPost(db.Model):
         """Human-readable update date"""
         return self.updated_at.strftime('%A, %d %B %Y')
 
+    @cached_property
+    def related_content(self) -> list[RelatedItem]:
+        """Get related content"""
+        return RelatedContent.resolve(ContentType.BLOG, self.id)
+
+    @property
+    def document_text(self) -> str:
+        """All text describing this post, for indexing"""
+        return '\n'.join([
+            self.title, self.subtitle or '', self.extract, self.body,
+            *(tag.title for tag in self.tags), *(tech.title for tech in self.technologies),
+        ])
+
+    @property
+    def search_fields(self) -> dict[str, str]:
+        """The columns of the search document of this post"""
+        return {
+            'title': self.title,
+            'subtitle': self.subtitle or '',
+            'extract': self.extract,
+            'body': self.body,
+            'keywords': ' '.join([*(tag.title for tag in self.tags), *(tech.title for tech in self.technologies)]),
+        }
+
+    @classmethod
+    def for_card(cls):
+        """Query loading only the columns a blogpost card renders, leaving out the body"""
+        return cls.query.options(load_only(
+            cls.id, cls.created_at, cls.title, cls.subtitle, cls.extract, cls.image, cls.thumbnail, cls.slug,
+        ))
+
+    @classmethod
+    def get_page(cls, limit: int, cursor: str | None = None) -> tuple[list["BlogPost"], str | None]:
+        """Get a page of blogposts, newest first, and the cursor of the next page"""
+        return keyset_page(cls, cls.for_card(), limit, cursor)
+
+    @classmethod
+    def for_detail(cls):
+        """Query eager loading everything the blogpost page renders"""
+        return cls.query.options(
+            joinedload(cls.category),
+            selectinload(cls.tags),
+            selectinload(cls.technologies),
+        )
+
     @classmethod
     def get_recent(cls, limit: int = 3) -> list["BlogPost"]:
         """Get recent blogposts ordered by date"""
-        return cls.query.order_by(cls.created_at.desc()).limit(limit).all()
+        return cls.for_card().order_by(cls.created_at.desc()).limit(limit).all()
     
     @classmethod
     def get_by_slug(cls, slug: str) -> "BlogPost | None":
@@ -474,12 +715,12 @@ class BlogPost(db.Model):
     @classmethod
     def with_technology(cls, technology_title: str) -> list["BlogPost"]:
         """Get blogposts with a specific technology"""
-        return cls.query.join(cls.tags).filter(Technology.title == technology_title).all()
+        return cls.query.join(cls.technologies).filter(Technology.title == technology_title).all()
 
     @classmethod
     def with_category(cls, category_title: str) -> list["BlogPost"]:
         """Get blogposts with a specific category"""
-        return cls.query.join(cls.tags).filter(Category.title == category_title).all()
+        return cls.query.join(cls.category).filter(Category.title == category_title).all()
 
 class Project(db.Model):
     """
@@ -545,14 +786,16 @@ class Project(db.Model):
     related_sources = db.relationship(
         "RelatedContent",
         primaryjoin="and_(foreign(RelatedContent.source_id) == Project.id, RelatedContent.source_type == 'code_project')",
-        cascade="all, delete-orphan",
+        viewonly=True,
+        overlaps="related_sources",
         lazy="select",
     )
 
     related_targets = db.relationship(
         "RelatedContent",
-        primaryjoin="and_(foreign(RelatedContent.target_id) == Project.id, RelatedContent.source_type == 'code_project')",
-        cascade="all, delete-orphan",
+        primaryjoin="and_(foreign(RelatedContent.target_id) == Project.id, RelatedContent.target_type == 'code_project')",
+        viewonly=True,
+        overlaps="related_targets",
         lazy="select",
     )
 
@@ -596,13 +839,13 @@ class Project(db.Model):
 
     @property
     def url(self) -> str:
-        """Generate full URL for this post"""
-        return url_for('main.blogpost', post_id=self.id, post_slug=self.slug, _external=True)
+        """Generate full URL for this project"""
+        return url_for('main.project', project_id=self.id, project_slug=self.slug, _external=True)
 
     @property
     def image_url(self) -> str:
         """Generate full URL for the image attached to this post"""
-        return url_for('static', filename=self.image, _external=True)
+        return asset_url(self.image, _external=True)
 
     @property
     def has_github(self) -> bool:
@@ -666,55 +909,75 @@ class Project(db.Model):
         """Filter section by exploration type"""
         return [s for s in self.sections if s.type == SectionType.EXPLORATION]
        
-    @property
-    def related_content(self) -> list[RelatedContent]:
+    @cached_property
+    def related_content(self) -> list[RelatedItem]:
         """Get related content"""
-        results = []
-        rels = list(self.related_sources) + list(self.related_targets) #type: ignore
-
-        for rel in rels:
-            if rel.source_type == "code_project" and rel.source_id != self.id:
-                obj = Project.query.get(rel.source_id)
-                if obj:
-                    results.append(RelatedItem("code_project", obj))
-            elif rel.target_type == "code_project" and rel.target_id != self.id:
-                obj = Project.query.get(rel.target_id)
-                if obj:
-                    results.append(RelatedItem("code_project", obj))
-            elif rel.source_type == "blogpost":
-                obj = BlogPost.query.get(rel.source_id)
-                if obj:
-                    results.append(RelatedItem("blogpost", obj))
-            elif rel.target_type == "blogpost":
-                obj = BlogPost.query.get(rel.target_id)
-                if obj:
-                    results.append(RelatedItem("blogpost", obj))
-
-        seen = set()
-        unique = []
-        for item in results:
-            key = (item.type, item.object.id)
-            if key not in seen:
-                seen.add(key)
-                unique.append(item)
-
-        return unique[:5]
+        return RelatedContent.resolve(ContentType.PROJECT, self.id)
 
+    @property
+    def document_text(self) -> str:
+        """All text describing this project, for indexing"""
+        return '\n'.join([
+            self.title, self.subtitle, self.extract,
+            *(section.body for section in self.sections),
+            *(tag.title for tag in self.tags), *(tech.title for tech in self.technologies),
+        ])
+
+    @property
+    def search_fields(self) -> dict[str, str]:
+        """The columns of the search document of this project"""
+        return {
+            'title': self.title,
+            'subtitle': self.subtitle,
+            'extract': self.extract,
+            'body': '\n\n'.join(section.body for section in self.sections),
+            'keywords': ' '.join([*(tag.title for tag in self.tags), *(tech.title for tech in self.technologies)]),
+        }
+
+
+    @classmethod
+    def for_card(cls):
+        """Query loading only the columns a project card renders, and its technologies"""
+        return cls.query.options(
+            load_only(cls.id, cls.created_at, cls.title, cls.subtitle, cls.status, cls.extract, cls.slug),
+            selectinload(cls.technologies),
+        )
+
+    @classmethod
+    def get_page(cls, limit: int, cursor: str | None = None) -> tuple[list["Project"], str | None]:
+        """Get a page of projects, newest first, and the cursor of the next page"""
+        return keyset_page(cls, cls.for_card(), limit, cursor)
+
+    @classmethod
+    def for_detail(cls):
+        """Query eager loading everything the project page renders"""
+        return cls.query.options(
+            joinedload(cls.category),
+            selectinload(cls.tags),
+            selectinload(cls.technologies),
+            selectinload(cls.features),
+            selectinload(cls.sections),
+        )
 
     @classmethod
     def get_recent(cls, limit: int = 3) -> list["Project"]:
         """Get recent projects ordered by date"""
-        return cls.query.order_by(cls.created_at.desc()).limit(limit).all()
+        return cls.for_card().order_by(cls.created_at.desc()).limit(limit).all()
      
+    @classmethod
+    def deployed(cls):
+        """Criterion of the projects that have been deployed, the ones in the navbar"""
+        return cls.deployment_url.is_not(None) & (cls.deployment_url != '')
+
     @classmethod
     def get_deployed(cls) -> list["Project"]:
         """Get projects that have been deployed"""
-        return cls.query.filter((cls.deployment_url.is_not(None)) & (cls.deployment_url != '')).all()
+        return cls.query.filter(cls.deployed()).all()
      
     @classmethod
     def get_featured(cls) -> list["Project"]:
         """Get projects that have been featured"""
-        return cls.query.filter(cls.featured_order.is_not(None)).order_by(cls.featured_order.asc()).all()
+        return cls.for_card().filter(cls.featured_order.is_not(None)).order_by(cls.featured_order.asc()).all()
 
     @classmethod
     def get_by_slug(cls, slug: str) -> "Project | None":
@@ -734,11 +997,343 @@ class Project(db.Model):
     @classmethod
     def with_technology(cls, technology_title: str) -> list["Project"]:
         """Get projects with a specific technology"""
-        return cls.query.join(cls.tags).filter(Technology.title == technology_title).all()
+        return cls.query.join(cls.technologies).filter(Technology.title == technology_title).all()
 
     @classmethod
     def with_category(cls, category_title: str) -> list["Project"]:
         """Get projects with a specific category"""
-        return cls.query.join(cls.tags).filter(Category.title == category_title).all()
+        return cls.query.join(cls.category).filter(Category.title == category_title).all()
+
+
+def get_or_create_by_title(model, rows: dict[str, dict | None]) -> dict:
+    """
+    Resolve rows of a model with a unique title: one IN query for the existing rows, one insert for
+    the missing ones and one query to read those back. Rows without values are only looked up.
+    A concurrent request inserting the same title is not an error, the insert skips conflicting rows
+    and the read back returns whichever row won.
+    """
+    if not rows:
+        return {}
+    found = {obj.title: obj for obj in model.query.filter(model.title.in_(rows)).all()}
+
+    # Case-insensitive collations (the MySQL default) match titles that differ in case
+    folded = {title.casefold(): obj for title, obj in found.items()}
+    missing = [values for title, values in rows.items()
+               if values is not None and title not in found and title.casefold() not in folded]
+    if missing:
+        db.session.execute(insert_ignore(model).values(missing))
+        # A locking read sees rows committed by other transactions after this one started
+        created = model.query.filter(model.title.in_([values['title'] for values in missing])).with_for_update(read=True)
+        found.update((obj.title, obj) for obj in created)
+        folded.update((obj.title.casefold(), obj) for obj in found.values())
+
+    resolved = {title: found.get(title) or folded.get(title.casefold()) for title in rows}
+    return {title: obj for title, obj in resolved.items() if obj is not None}
+
+
+def insert_ignore(model):
+    """An INSERT that skips rows conflicting with a unique constraint instead of failing"""
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(model).on_conflict_do_nothing()
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+        return postgresql_insert(model).on_conflict_do_nothing()
+    if dialect in ('mysql', 'mariadb'):
+        return insert(model).prefix_with('IGNORE')
+    return insert(model)
+
+
+def keyset_page(model, query, limit: int, cursor: str | None = None):
+    """
+    Page through a query newest first, continuing after the (created_at, id) in the cursor.
+    Unlike an offset, this costs the same for every page, however long the archive gets.
+    """
+    after = decode_cursor(cursor)
+    if after is not None and len(after) == 2:
+        try:
+            created_at, last_id = datetime.fromisoformat(after[0]), int(after[1])
+        except (TypeError, ValueError):
+            pass
+        else:
+            query = query.filter(tuple_(model.created_at, model.id) < (created_at, last_id))
+
+    items = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        if items:
+            next_cursor = encode_cursor(items[-1].created_at.isoformat(), items[-1].id)
+    return items, next_cursor
+
+
+def load_content(keys: set[tuple[ContentType, int]] | None = None):
+    """Yield (key, entity) of blogposts and projects, all of them or only those with the given keys"""
+    models = {ContentType.BLOG: BlogPost, ContentType.PROJECT: Project}
+    for content_type, model in models.items():
+        query = model.for_detail()
+        if keys is not None:
+            ids = [content_id for t, content_id in keys if t == content_type]
+            if not ids:
+                continue
+            query = query.filter(model.id.in_(ids))
+        for obj in query:
+            yield (content_type, obj.id), obj
+
+
+def similarity_documents(keys: set[tuple[ContentType, int]] | None = None):
+    """Yield (key, text) of blogposts and projects, all of them or only those with the given keys"""
+    for key, obj in load_content(keys):
+        yield key, obj.document_text
 
 
+def parse_content_key(key: str) -> tuple[ContentType, int]:
+    """Turn 'blogpost:3' back into (ContentType.BLOG, 3)"""
+    content_type, content_id = key.rsplit(':', 1)
+    return ContentType(content_type), int(content_id)
+
+
+def format_content_key(key: tuple[ContentType, int]) -> str:
+    return f'{key[0].value}:{key[1]}'
+
+
+def content_versions() -> dict[tuple[ContentType, int], str]:
+    """When every blogpost and project last changed, the versions of the documents of the similarity index"""
+    models = {ContentType.BLOG: BlogPost, ContentType.PROJECT: Project}
+    return {
+        (content_type, content_id): updated_at.isoformat() if updated_at else ''
+        for content_type, model in models.items()
+        for content_id, updated_at in db.session.execute(select(model.id, model.updated_at))
+    }
+
+
+def similar_content(content_type: ContentType, content_id: int, limit: int = 5) -> list[tuple[ContentType, int]]:
+    """
+    Keys of the content most similar to an entity, loading or building the index on first use.
+    At most every SIMILARITY_INDEX_TTL seconds the index is checked against the database, so writes
+    handled by other workers, or made after the index was stored, are picked up. None of the content
+    loaded for the index becomes a dependency of the page asking, only the similar content it shows.
+    """
+    with page_cache.untagged():
+        if not similarity_index.loaded:
+            if not similarity_index.load(current_app.config['SIMILARITY_INDEX_PATH'], parse_content_key):
+                similarity_index.build(similarity_documents(), content_versions())
+        if similarity_index.expired:
+            similarity_index.sync(content_versions())
+        similarity_index.refresh(similarity_documents)
+    return [key for key, score in similarity_index.similar((content_type, content_id), limit)] # type: ignore[misc]
+
+
+def load_cards(keys) -> dict[tuple[ContentType, int], "BlogPost | Project"]:
+    """Blogposts and projects by (type, id), loaded for their cards with one IN query per content type"""
+    models = {ContentType.BLOG: BlogPost, ContentType.PROJECT: Project}
+    found = {}
+    for content_type, model in models.items():
+        ids = [content_id for t, content_id in keys if t == content_type]
+        if ids:
+            for obj in model.for_card().filter(model.id.in_(ids)):
+                found[(content_type, obj.id)] = obj
+    return found
+
+
+def content_validators(posts: bool | list[int] = True, projects: bool | list[int] = True) -> tuple[datetime | None, tuple]:
+    """
+    When the content a page shows last changed, and the timestamps it is fingerprinted with, from one
+    aggregate query. posts and projects are all of them if True, none if False or the ids the page
+    shows. The navbar and the last deletion are part of every page, a deleted item may have been on it.
+    """
+    columns = []
+    for model, ids in ((BlogPost, posts), (Project, projects)):
+        if ids is True:
+            columns.append(select(func.max(model.updated_at)).scalar_subquery())
+        elif ids:
+            columns.append(select(func.max(model.updated_at)).where(model.id.in_(ids)).scalar_subquery())
+    columns.append(select(func.max(Project.updated_at)).where(Project.deployed()).scalar_subquery())
+    columns.append(select(func.max(DeletedContent.deleted_at)).scalar_subquery())
+    timestamps = tuple(db.session.execute(select(*columns)).one())
+    return max(filter(None, timestamps), default=None), timestamps
+
+
+def search_content(query: str, limit: int = 20, cursor: str | None = None):
+    """
+    Get a page of search results as (result, entity) pairs, and the cursor of the next page.
+    The entities are loaded with one IN query per content type.
+    """
+    results = search.search(db.session, query, limit + 1, decode_cursor(cursor))
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        if results:
+            next_cursor = encode_cursor(results[-1].score, results[-1].rowid)
+
+    kinds = {'blogpost': ContentType.BLOG, 'project': ContentType.PROJECT}
+    found = dict(load_content({(kinds[r.kind], r.entity_id) for r in results}))
+    pairs = [(r, found[(kinds[r.kind], r.entity_id)]) for r in results if (kinds[r.kind], r.entity_id) in found]
+    return pairs, next_cursor
+
+
+class FacetIndex:
+    """
+    Blogposts and projects oldest first, and for every tag, technology and category a bitset of the
+    positions of the content having it. Filtering by several facets is an AND of integers and counting
+    the matches a popcount, so faceted browsing never joins the association tables.
+    """
+    FACETS = ('tag', 'technology', 'category')
+
+    def __init__(self, items, memberships) -> None:
+        # Sort keys are (created_at, type value, id), the newest content has the highest position
+        self._keys = sorted(items)
+        self._positions = {(ContentType(value), content_id): position
+                           for position, (_, value, content_id) in enumerate(self._keys)}
+        self.all = (1 << len(self._keys)) - 1
+        self._bits: dict[str, dict[str, int]] = {facet: {} for facet in self.FACETS}
+        for facet, title, content_type, content_id in memberships:
+            position = self._positions.get((content_type, content_id))
+            if position is not None:
+                values = self._bits[facet]
+                values[title] = values.get(title, 0) | (1 << position)
+
+    @classmethod
+    def load(cls) -> "FacetIndex":
+        """Build the index from one scan of each content and association table"""
+        items = [(created_at, content_type.value, content_id)
+                 for content_type, model in ((ContentType.BLOG, BlogPost), (ContentType.PROJECT, Project))
+                 for content_id, created_at in db.session.execute(db.select(model.id, model.created_at))]
+
+        memberships = []
+        for content_type, model, tags, technologies, column in (
+                (ContentType.BLOG, BlogPost, blogpost_tags, blogpost_technologies, 'blogpost_id'),
+                (ContentType.PROJECT, Project, project_tags, project_technologies, 'project_id')):
+            for facet, query in (
+                    ('tag', db.select(Tag.title, tags.c[column]).join(tags, tags.c.tag_id == Tag.id)),
+                    ('technology', db.select(Technology.title, technologies.c[column]).join(technologies, technologies.c.technology_id == Technology.id)),
+                    ('category', db.select(Category.title, model.id).join(model, model.category_id == Category.id))):
+                memberships.extend((facet, title, content_type, content_id) for title, content_id in db.session.execute(query))
+        return cls(items, memberships)
+
+    def values(self, facet: str) -> dict[str, int]:
+        return self._bits[facet]
+
+    def select(self, filters: dict[str, list[str]]) -> int:
+        """Bitset of the content having every one of the facet values, unknown values match nothing"""
+        selection = self.all
+        for facet, titles in filters.items():
+            for title in titles:
+                selection &= self._bits[facet].get(title, 0)
+        return selection
+
+    def counts(self, selection: int) -> dict[str, list[tuple[str, int]]]:
+        """Matches per facet value within a selection, most matches first, leaving out values without any"""
+        counts = {}
+        for facet, values in self._bits.items():
+            matches = ((title, (bits & selection).bit_count()) for title, bits in values.items())
+            counts[facet] = sorted(((title, count) for title, count in matches if count), key=lambda item: (-item[1], item[0]))
+        return counts
+
+    def page(self, selection: int, limit: int, cursor: str | None = None) -> tuple[list[tuple[ContentType, int]], str | None]:
+        """Keys of a page of the selection newest first, and the cursor of the next page"""
+        after = decode_cursor(cursor)
+        if after is not None:
+            try:
+                key = (datetime.fromisoformat(after[0]), str(after[1]), int(after[2]))
+            except (ValueError, IndexError, TypeError):
+                key = None
+            if key is not None:
+                # Only the content older than the last item of the previous page
+                selection &= (1 << bisect_left(self._keys, key)) - 1
+
+        keys = []
+        while selection and len(keys) <= limit:
+            position = selection.bit_length() - 1
+            selection ^= 1 << position
+            keys.append(position)
+        next_cursor = None
+        if len(keys) > limit:
+            keys = keys[:limit]
+            created_at, value, content_id = self._keys[keys[-1]]
+            next_cursor = encode_cursor(created_at.isoformat(), value, content_id)
+        return [(ContentType(self._keys[position][1]), self._keys[position][2]) for position in keys], next_cursor
+
+
+facet_index = Snapshot(FacetIndex.load)
+
+
+@event.listens_for(Session, 'before_flush')
+def _delete_related_links(session, flush_context, instances):
+    """
+    Links have no foreign key, they point at a (type, id) pair, so the links of deleted content are
+    deleted here, one query for all of it. Registered before _touch_changed_content, which then
+    updates the content at the other end of every deleted link.
+    """
+    deleted = [(ContentType.BLOG if isinstance(obj, BlogPost) else ContentType.PROJECT, obj.id)
+               for obj in session.deleted if isinstance(obj, (BlogPost, Project))]
+    if not deleted:
+        return
+    links = session.scalars(select(RelatedContent).where(
+        tuple_(RelatedContent.source_type, RelatedContent.source_id).in_(deleted)
+        | tuple_(RelatedContent.target_type, RelatedContent.target_id).in_(deleted)
+    ))
+    for link in links:
+        session.delete(link)
+
+
+@event.listens_for(Session, 'before_flush')
+def _touch_changed_content(session, flush_context, instances):
+    """
+    A page shows more of its content than the columns of its row, and it changes when content it
+    shows is deleted. Any such change updates the content it belongs to, or records the deletion,
+    so the validators of every page showing it (see content_validators) only ever move forward.
+    """
+    now = datetime.now(timezone.utc)
+    models = {ContentType.BLOG: BlogPost, ContentType.PROJECT: Project}
+    dirty = [obj for obj in session.dirty if session.is_modified(obj)]
+
+    def touch(content) -> None:
+        if content is not None and content not in session.deleted:
+            content.updated_at = now
+
+    for obj in [*session.new, *dirty, *session.deleted]:
+        if isinstance(obj, (ProjectFeature, ProjectSection)):
+            # Features and sections are part of their project
+            touch(obj.project or (session.get(Project, obj.project_id) if obj.project_id else None))
+        elif isinstance(obj, RelatedContent):
+            touch(session.get(models[obj.source_type], obj.source_id))
+            touch(session.get(models[obj.target_type], obj.target_id))
+    for obj in dirty:
+        if isinstance(obj, (BlogPost, Project)):
+            # Changing only tags, technologies or the category updates no column of the row
+            touch(obj)
+        elif isinstance(obj, (Tag, Technology, Category)):
+            for model in models.values():
+                if isinstance(obj, Category):
+                    shown = model.category_id == obj.id
+                else:
+                    shown = getattr(model, 'tags' if isinstance(obj, Tag) else 'technologies').any(id=obj.id)
+                session.execute(update(model).where(shown).values(updated_at=now),
+                                execution_options={'synchronize_session': False})
+    for obj in session.deleted:
+        if isinstance(obj, (BlogPost, Project)):
+            content_type = ContentType.BLOG if isinstance(obj, BlogPost) else ContentType.PROJECT
+            session.add(DeletedContent(content_type=content_type, content_id=obj.id, deleted_at=now))
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_search_table(target, connection, **kw):
+    """The search table is no model, it is created and dropped together with them"""
+    search.create_table(connection)
+
+
+@event.listens_for(db.metadata, 'after_drop')
+def _drop_search_table(target, connection, **kw):
+    search.drop_table(connection)
+
+
+@event.listens_for(BlogPost.body, 'set')
+@event.listens_for(ProjectSection.body, 'set')
+def _discard_stale_html(target, value, oldvalue, initiator):
+    """Any change to a body outdates the stored HTML until render_body() is called again"""
+    if value != oldvalue:
+        target.body_html = None
+        if isinstance(oldvalue, str) and has_app_context():
+            forget_content(markdown(oldvalue))
@@ -0,0 +1,102 @@
+"""
+Fingerprinted static asset URLs.
+
+The manifest maps every static file to a hash of its content, and `asset_url` puts that hash in the
+URL: /static/v/<digest>/<filename>. A changed file gets a new URL, so hashed responses can be cached
+forever. The manifest is loaded from ASSET_MANIFEST_PATH (written by `flask assets manifest`) or
+built once at startup, every lookup after that is a dict access without touching the disk.
+"""
+import json
+import os
+from hashlib import sha256
+
+from flask import current_app, redirect, url_for
+from werkzeug.security import safe_join
+
+from app.utility.compression import ENCODINGS
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def file_digest(path: str) -> str:
+    digest = sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class AssetManifest:
+    """Content digests of the static files, keyed by their path relative to the static folder"""
+
+    def __init__(self) -> None:
+        self.folder = ''
+        self.digests: dict[str, str] = {}
+
+    def init_app(self, app) -> None:
+        self.folder = app.static_folder or ''
+        path = app.config['ASSET_MANIFEST_PATH']
+        if self.is_current(path):
+            with open(path, encoding='utf-8') as f:
+                self.digests = json.load(f)
+        else:
+            self.digests = self.build()
+        app.add_url_rule(f'{app.static_url_path}/v/<digest>/<path:filename>', 'static_versioned', self.serve)
+        app.jinja_env.globals['asset_url'] = asset_url
+
+    def is_current(self, path: str) -> bool:
+        """Whether a stored manifest exists and no static file changed after it was written"""
+        if not os.path.exists(path):
+            return False
+        written = os.path.getmtime(path)
+        return all(os.path.getmtime(os.path.join(directory, name)) <= written
+                   for directory, _, names in os.walk(self.folder) for name in names)
+
+    def build(self) -> dict[str, str]:
+        """Hash every static file, leaving out precompressed siblings"""
+        suffixes = tuple(ENCODINGS.values())
+        digests = {}
+        for directory, _, names in os.walk(self.folder):
+            for name in names:
+                if name.endswith(suffixes):
+                    continue
+                path = os.path.join(directory, name)
+                digests[os.path.relpath(path, self.folder).replace(os.sep, '/')] = file_digest(path)
+        return dict(sorted(digests.items()))
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.digests, f, indent=0)
+
+    def add(self, filename: str) -> None:
+        """Record a static file written while the application runs"""
+        filename = filename.lstrip('/')
+        self.digests[filename] = file_digest(os.path.join(self.folder, filename))
+
+    def serve(self, digest: str, filename: str):
+        """Serve a hashed URL, cached forever, or send outdated URLs to the current file"""
+        if filename not in self.digests:
+            # Written after the manifest, by this worker or another one, like resized images
+            path = safe_join(self.folder, filename)
+            if path is not None and os.path.isfile(path):
+                self.add(filename)
+        if self.digests.get(filename) != digest:
+            return redirect(asset_url(filename))
+        response = current_app.view_functions['static'](filename=filename)
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+
+asset_manifest = AssetManifest()
+
+
+def asset_url(filename: str, _external: bool = False) -> str:
+    """URL of a static file with its content digest in it, or the plain static URL if it is not in the manifest"""
+    filename = filename.lstrip('/')
+    digest = asset_manifest.digests.get(filename)
+    if digest is None:
+        return url_for('static', filename=filename, _external=_external)
+    return url_for('static_versioned', digest=digest, filename=filename, _external=_external)
@@ -0,0 +1,304 @@
+"""
+Full-page response cache for the public routes.
+
+Pages are stored together with the content keys they depend on (see app/events.py), so a write only
+drops the pages that show the changed content. The keys are also sent as a Surrogate-Key header, for
+a caching proxy that can purge by key. Two backends are available:
+    memory: an in-process LRU, every gunicorn worker has its own copy, so a purge only reaches the
+            worker that handled the write and the others drop their copies after PAGE_CACHE_TTL
+    sqlite: a shared on-disk store, so all workers on a host serve and invalidate the same pages.
+            Pages still expire after PAGE_CACHE_TTL, a worker may have rendered one from snapshots
+            (navbar, related graph, facet index) that did not see a write yet
+"""
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from time import time
+from typing import NamedTuple
+
+from flask import g, request, make_response, has_app_context
+
+
+# Headers that are regenerated on every response and never cached
+UNCACHED_HEADERS = frozenset(('content-type', 'content-length', 'set-cookie', 'x-cache'))
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    mimetype: str
+    headers: tuple[tuple[str, str], ...] = ()
+
+
+class MemoryBackend:
+    """
+    In-process LRU of pages with a reverse index from content key to cached pages.
+    The ttl bounds how long a page is served after a write another worker handled.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._pages: OrderedDict[str, tuple[CachedPage, frozenset[str], float]] = OrderedDict()
+        self._index: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CachedPage | None:
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is None:
+                return None
+            if self.ttl and time() - entry[2] >= self.ttl:
+                self._remove(key)
+                return None
+            self._pages.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, page: CachedPage, tags: set[str]) -> None:
+        with self._lock:
+            self._remove(key)
+            self._pages[key] = (page, frozenset(tags), time())
+            for tag in tags:
+                self._index.setdefault(tag, set()).add(key)
+            while len(self._pages) > self.maxsize:
+                self._remove(next(iter(self._pages)))
+
+    def invalidate(self, tags) -> int:
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._index.get(tag, set())
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+            self._index.clear()
+
+    def size(self) -> int:
+        return len(self._pages)
+
+    def _remove(self, key: str) -> None:
+        entry = self._pages.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[tag]
+
+
+class SQLiteBackend:
+    """Pages stored in a SQLite file shared by all workers, trimmed to the oldest pages past maxsize or ttl"""
+
+    def __init__(self, path: str, maxsize: int = 512, ttl: float = 0) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS page (
+                    key TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    mimetype TEXT NOT NULL,
+                    headers TEXT NOT NULL,
+                    stored_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_page_stored_at ON page (stored_at);
+                CREATE TABLE IF NOT EXISTS page_tag (
+                    tag TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (tag, key)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS ix_page_tag_key ON page_tag (key);
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> CachedPage | None:
+        row = self._connect().execute('SELECT body, mimetype, headers, stored_at FROM page WHERE key = ?', (key,)).fetchone()
+        if row is None or (self.ttl and time() - row[3] >= self.ttl):
+            # An expired page is left to the next set() to remove, reads never write
+            return None
+        return CachedPage(row[0], row[1], tuple(map(tuple, json.loads(row[2]))))
+
+    def set(self, key: str, page: CachedPage, tags: set[str]) -> None:
+        with self._connect() as conn:
+            conn.execute('DELETE FROM page_tag WHERE key = ?', (key,))
+            conn.execute('INSERT OR REPLACE INTO page (key, body, mimetype, headers, stored_at) VALUES (?, ?, ?, ?, ?)',
+                         (key, page.body, page.mimetype, json.dumps(page.headers), time()))
+            conn.executemany('INSERT OR IGNORE INTO page_tag (tag, key) VALUES (?, ?)', [(tag, key) for tag in tags])
+            if self.ttl:
+                expired = time() - self.ttl
+                conn.execute('DELETE FROM page_tag WHERE key IN (SELECT key FROM page WHERE stored_at <= ?)', (expired,))
+                conn.execute('DELETE FROM page WHERE stored_at <= ?', (expired,))
+            conn.execute('DELETE FROM page_tag WHERE key IN (SELECT key FROM page ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+                         (self.maxsize,))
+            conn.execute('DELETE FROM page WHERE key IN (SELECT key FROM page ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+                         (self.maxsize,))
+
+    def invalidate(self, tags) -> int:
+        tags = list(tags)
+        if not tags:
+            return 0
+        placeholders = ', '.join('?' * len(tags))
+        with self._connect() as conn:
+            keys = [row[0] for row in conn.execute(f'SELECT DISTINCT key FROM page_tag WHERE tag IN ({placeholders})', tags)]
+            if keys:
+                conn.executemany('DELETE FROM page WHERE key = ?', [(key,) for key in keys])
+                conn.executemany('DELETE FROM page_tag WHERE key = ?', [(key,) for key in keys])
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute('DELETE FROM page')
+            conn.execute('DELETE FROM page_tag')
+
+    def size(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM page').fetchone()[0]
+
+
+class Snapshot:
+    """
+    A process-wide memoized value, loaded once and kept until it is invalidated.
+    The ttl bounds how long other workers can serve a value after a write they did not see.
+    """
+
+    def __init__(self, loader, ttl: float = 0) -> None:
+        self.loader = loader
+        self.ttl = ttl
+        self._value = None
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Get the value, loading it if there is none or it has expired"""
+        loaded_at = self._loaded_at
+        if loaded_at is not None and (not self.ttl or time() - loaded_at < self.ttl):
+            return self._value
+        with self._lock:
+            if self._loaded_at is None or (self.ttl and time() - self._loaded_at >= self.ttl):
+                self._value = self.loader()
+                self._loaded_at = time()
+            return self._value
+
+    def peek(self, default=None):
+        """Get the last loaded value without ever loading it, even if it has been invalidated since"""
+        return self._value if self._value is not None else default
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+
+class PageCache:
+    """Caches the responses of public views and drops them when the content they show changes"""
+
+    def __init__(self) -> None:
+        self.backend: MemoryBackend | SQLiteBackend | None = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def init_app(self, app) -> None:
+        from app.events import content_changed
+
+        backend = app.config['PAGE_CACHE']
+        if backend == 'memory':
+            self.backend = MemoryBackend(app.config['PAGE_CACHE_SIZE'], app.config['PAGE_CACHE_TTL'])
+        elif backend == 'sqlite':
+            self.backend = SQLiteBackend(app.config['PAGE_CACHE_PATH'], app.config['PAGE_CACHE_SIZE'], app.config['PAGE_CACHE_TTL'])
+        else:
+            self.backend = None
+        content_changed.connect(self._on_content_changed, weak=False)
+
+    def _on_content_changed(self, sender, keys: frozenset[str]) -> None:
+        self.purge(keys)
+
+    @staticmethod
+    def tag(*keys: str) -> None:
+        """Record content keys the page being rendered depends on"""
+        g.setdefault('cache_tags', set()).update(keys)
+
+    @staticmethod
+    @contextmanager
+    def untagged():
+        """Load content without the page depending on it, e.g. while building an index of all content"""
+        tags = g.pop('cache_tags', None) if has_app_context() else None
+        try:
+            yield
+        finally:
+            if tags is not None:
+                g.cache_tags = tags
+
+    def cached(self, view):
+        """Serve the view from the cache, every page depends on the navbar as well"""
+        @wraps(view)
+        def decorated_function(*args, **kwargs):
+            if self.backend is None or request.method != 'GET':
+                return view(*args, **kwargs)
+
+            key = request.full_path
+            page = self.backend.get(key)
+            if page is not None:
+                self.hits += 1
+                response = make_response(page.body)
+                response.mimetype = page.mimetype
+                response.headers.extend(page.headers)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            self.misses += 1
+            # g outlives the request when an app context was already pushed, start the tags afresh
+            g.cache_tags = {'navbar'}
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                # Lets a purge-capable proxy in front drop its copies by the same keys
+                response.headers['Surrogate-Key'] = ' '.join(sorted(g.cache_tags))
+                headers = tuple((name, value) for name, value in response.headers if name.lower() not in UNCACHED_HEADERS)
+                self.backend.set(key, CachedPage(response.get_data(), response.mimetype, headers), g.cache_tags)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return decorated_function
+
+    def purge(self, keys) -> int:
+        """Drop the pages depending on any of the keys, returns how many were dropped"""
+        if self.backend is None:
+            return 0
+        purged = self.backend.invalidate(keys)
+        self.invalidations += purged
+        return purged
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'size': self.backend.size() if self.backend else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
+
+
+page_cache = PageCache()
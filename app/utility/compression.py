@@ -0,0 +1,156 @@
+"""
+Response compression.
+
+Dynamic responses of a compressible type are compressed with brotli or gzip, whichever the client
+prefers, as they are sent: buffered bodies in one go above COMPRESS_MIN_SIZE, streamed bodies chunk
+by chunk. Static files are served from precompressed .br/.gz siblings written by
+`flask assets compress`, so they cost nothing to compress at request time. Brotli is optional, without
+the `brotli` package everything falls back to gzip.
+"""
+import gzip
+import mimetypes
+import os
+import zlib
+from functools import wraps
+from typing import Iterable, Iterator
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset((
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/javascript',
+    'application/json', 'application/javascript', 'application/xml',
+    'application/atom+xml', 'application/rss+xml', 'application/feed+json', 'image/svg+xml',
+))
+
+COMPRESSIBLE_EXTENSIONS = frozenset(('.css', '.js', '.svg', '.html', '.json', '.xml', '.txt', '.map'))
+
+# Preferred first, brotli compresses text noticeably better than gzip
+ENCODINGS = {'br': '.br', 'gzip': '.gz'} if brotli else {'gzip': '.gz'}
+
+
+def negotiate(accept_encodings) -> str | None:
+    """The best encoding the client accepts, if any"""
+    offered = [(accept_encodings[encoding], -rank, encoding) for rank, encoding in enumerate(ENCODINGS)
+               if accept_encodings[encoding]]
+    return max(offered)[2] if offered else None
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, level: int) -> Iterator[bytes]:
+    """Compress a streamed body, flushing after every chunk so the client can start rendering early"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=min(level, 11))
+        for chunk in chunks:
+            if chunk:
+                yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+def precompressed_files(folder: str, min_size: int) -> Iterator[str]:
+    """Files under a folder worth precompressing"""
+    for directory, _, names in os.walk(folder):
+        for name in names:
+            path = os.path.join(directory, name)
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS and os.path.getsize(path) >= min_size:
+                yield path
+
+
+def is_current(sibling: str, path: str) -> bool:
+    """Whether a precompressed sibling exists and is at least as new as its source file"""
+    try:
+        return os.path.getmtime(sibling) >= os.path.getmtime(path)
+    except OSError:
+        return False
+
+
+def write_precompressed(path: str, level: int = 9) -> list[str]:
+    """Write the .br/.gz siblings of a file that are missing or older than it, returns the ones written"""
+    written = []
+    data = None
+    for encoding, suffix in ENCODINGS.items():
+        target = path + suffix
+        if is_current(target, path):
+            continue
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        with open(target, 'wb') as f:
+            f.write(compress(data, encoding, 11 if encoding == 'br' else level))
+        written.append(target)
+    return written
+
+
+class Compression:
+    """Compresses responses after every request, and serves precompressed static files"""
+
+    def __init__(self) -> None:
+        self.min_size = 500
+        self.level = 6
+
+    def init_app(self, app) -> None:
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        self.level = app.config['COMPRESS_LEVEL']
+        app.after_request(self.after_request)
+        if 'static' in app.view_functions:
+            app.view_functions['static'] = self.precompressed(app, app.view_functions['static'])
+
+    def precompressed(self, app, static_view):
+        """Serve a .br or .gz sibling of a static file, when there is one the client accepts"""
+        @wraps(static_view)
+        def decorated_function(filename):
+            encoding = negotiate(request.accept_encodings)
+            if encoding is not None:
+                sibling = filename + ENCODINGS[encoding]
+                if is_current(os.path.join(app.static_folder, sibling), os.path.join(app.static_folder, filename)):
+                    response = send_from_directory(app.static_folder, sibling, max_age=app.get_send_file_max_age(filename))
+                    response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                    response.headers['Content-Encoding'] = encoding
+                    response.vary.add('Accept-Encoding')
+                    return response
+            return static_view(filename=filename)
+        return decorated_function
+
+    def after_request(self, response):
+        if (response.mimetype not in COMPRESSIBLE_MIMETYPES or response.status_code != 200
+                or 'Content-Encoding' in response.headers or request.method == 'HEAD'):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.direct_passthrough = False
+            response.response = compress_stream(response.iter_encoded(), encoding, self.level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(compress(data, encoding, self.level))
+
+        response.headers['Content-Encoding'] = encoding
+        # The compressed bytes differ from the identity ones, so a strong validator becomes weak
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+compression = Compression()
@@ -0,0 +1,70 @@
+"""
+Conditional GET for the public pages.
+
+Every page has a validator, a function answering with one aggregate query when the content the page
+shows last changed and a fingerprint of it (see content_validators in app/models.py). It is checked
+against If-None-Match and If-Modified-Since before the view runs, so a client or proxy that already
+has the page gets an empty 304 without the page being rendered or read from the page cache.
+
+Last-Modified is the newest updated_at of that content. Changes that are not edits of a row of it,
+a related link, a renamed tag or a deletion, touch the content they change, so it only ever moves
+forward. The ETag also covers the path and the templates and static files, so every page has its
+own and a deploy is never answered with a 304.
+"""
+import os
+from datetime import datetime
+from functools import wraps
+from hashlib import sha256
+from typing import Callable
+
+from flask import request, make_response, current_app
+from werkzeug.http import is_resource_modified
+
+
+class ConditionalGet:
+    """Answers conditional requests for views decorated with `validated`"""
+
+    def __init__(self) -> None:
+        self.version = ''
+        self.not_modified = 0
+
+    def init_app(self, app) -> None:
+        # Newest template or static file, so the validators change with every deploy
+        mtimes = [
+            os.stat(os.path.join(directory, name)).st_mtime_ns
+            for folder in (app.template_folder, app.static_folder) if folder
+            for directory, _, names in os.walk(os.path.join(app.root_path, folder))
+            for name in names
+        ]
+        self.version = str(max(mtimes, default=0))
+
+    def validated(self, validator: Callable[..., tuple[datetime | None, tuple]]):
+        """Decorate a view with a validator, called with the view arguments, returning (last modified, fingerprint)"""
+        def decorator(view):
+            @wraps(view)
+            def decorated_function(*args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return view(*args, **kwargs)
+
+                last_modified, fingerprint = validator(**kwargs)
+                etag = sha256(repr((self.version, request.full_path, fingerprint)).encode('utf-8')).hexdigest()[:32]
+                if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                    self.not_modified += 1
+                    response = current_app.response_class(status=304)
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                response.set_etag(etag)
+                if last_modified is not None:
+                    response.last_modified = last_modified
+                response.headers['Cache-Control'] = 'no-cache'
+                return response
+            return decorated_function
+        return decorator
+
+    def stats(self) -> dict:
+        return {'not_modified': self.not_modified}
+
+
+conditional_get = ConditionalGet()
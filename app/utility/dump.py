@@ -0,0 +1,69 @@
+"""
+Streaming JSONL dumps of the content database.
+
+Every line is one row, {"table": ..., "row": {...}}, with tables in foreign key order and rows in
+primary key order. Rows keep their ids, so a dump restores every relationship as it was. Both
+directions stream: export reads in chunks with a server-side cursor where the driver has one, and
+import inserts every chunk with a single executemany, so memory stays bounded by the chunk size.
+"""
+import json
+from datetime import date, datetime
+from itertools import groupby, islice
+from typing import Callable, Iterable, Iterator
+
+from sqlalchemy import DateTime, Table, select
+
+
+def dump_tables(metadata) -> list[Table]:
+    """The tables of a dump, parents before the tables referring to them"""
+    return list(metadata.sorted_tables)
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Cannot serialise {type(value).__name__}')
+
+
+def export_rows(session, tables: list[Table], chunk_size: int = 1000) -> Iterator[str]:
+    """Every row of the tables as JSON lines"""
+    for table in tables:
+        result = session.execute(select(table).order_by(*table.primary_key.columns),
+                                 execution_options={'yield_per': chunk_size})
+        for row in result.mappings():
+            yield json.dumps({'table': table.name, 'row': dict(row)}, default=_encode, ensure_ascii=False) + '\n'
+
+
+def _decoder(table: Table) -> Callable[[dict], dict]:
+    datetimes = [column.name for column in table.columns if isinstance(column.type, DateTime)]
+
+    def decode(row: dict) -> dict:
+        for name in datetimes:
+            if row.get(name) is not None:
+                row[name] = datetime.fromisoformat(row[name])
+        return row
+    return decode
+
+
+def import_rows(session, tables: list[Table], lines: Iterable[str], chunk_size: int = 1000) -> Iterator[tuple[str, int]]:
+    """
+    Insert the rows of a dump in chunks, yielding (table, rows inserted) after every chunk.
+    Lines for tables that are not in the dump's tables are rejected, not silently skipped.
+    """
+    by_name = {table.name: table for table in tables}
+    decoders = {name: _decoder(table) for name, table in by_name.items()}
+    records = (json.loads(line) for line in lines if line.strip())
+
+    for name, group in groupby(records, key=lambda record: record['table']):
+        if name not in by_name:
+            raise ValueError(f'Unknown table in dump: {name}')
+        rows = (decoders[name](record['row']) for record in group)
+        while chunk := list(islice(rows, chunk_size)):
+            session.execute(by_name[name].insert(), chunk)
+            yield name, len(chunk)
+
+
+def clear_tables(session, tables: list[Table]) -> None:
+    """Delete every row, children before their parents"""
+    for table in reversed(tables):
+        session.execute(table.delete())
@@ -0,0 +1,258 @@
+"""
+Responsive image variants.
+
+Content images are uploaded at whatever size they were made, a 1920px photo ends up in a 300px card.
+For every image a post, project or technology shows, resized copies at IMAGE_WIDTHS are written to a
+folder under static in modern formats (AVIF where Pillow can encode it, and WebP), with a small JSON
+sidecar listing them. Resizing is CPU bound, so it runs in a bounded process pool after the API
+commits, never in the request. Templates ask `image_sources` for the variants as srcset candidates,
+and keep the original image as the fallback. The sidecar and the variants are added to the asset
+manifest when the sidecar is read, so their URLs are fingerprinted and cached forever like every other
+static file. The srcset of an image is kept with the digest of its sidecar, the file is only looked at
+again every IMAGE_SOURCES_TTL seconds, for variants another worker wrote in the meantime.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from time import time
+from typing import Iterable, Iterator
+
+from werkzeug.security import safe_join
+
+from app.utility.assets import file_digest, asset_url, asset_manifest
+
+from PIL import Image, ImageOps, features
+
+RESIZABLE_EXTENSIONS = frozenset(('.jpg', '.jpeg', '.png', '.webp'))
+
+FORMATS = {
+    'avif': ('AVIF', 'image/avif'),
+    'webp': ('WEBP', 'image/webp'),
+}
+
+
+def sidecar_path(folder: str, filename: str) -> str:
+    return os.path.join(folder, filename + '.json')
+
+
+def read_sidecar(path: str) -> dict | None:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path: str, write) -> None:
+    """Write through a temporary file, so a page never links a half written variant"""
+    temporary = f'{path}.{os.getpid()}.tmp'
+    write(temporary)
+    os.replace(temporary, path)
+
+
+def write_variants(static_folder: str, derived: str, filename: str, widths: tuple[int, ...],
+                   formats: tuple[str, ...], quality: int) -> dict | None:
+    """
+    Resize one static image into the derived folder, returns its sidecar if anything was written.
+    Runs in a worker process. The variants of an unchanged image are left as they are, the ones of a
+    replaced image are removed once the new ones exist.
+    """
+    source = os.path.join(static_folder, filename)
+    folder = os.path.join(static_folder, derived)
+    path = sidecar_path(folder, filename)
+    digest = file_digest(source)
+    previous = read_sidecar(path)
+    if (previous and previous['digest'] == digest and previous['widths'] == list(widths)
+            and list(previous['sources']) == [FORMATS[name][1] for name in formats]):
+        return None
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    stem = os.path.splitext(filename)[0]
+    sources: dict[str, list] = {}
+    with Image.open(source) as opened:
+        image = ImageOps.exif_transpose(opened)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        # Never upscale, widths beyond the original collapse into one full size variant
+        for width in sorted({min(width, image.width) for width in widths}, reverse=True):
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+            for name in formats:
+                pil_format, mimetype = FORMATS[name]
+                variant = f'{stem}-{digest}-{width}.{name}'
+                _write_atomic(os.path.join(folder, variant),
+                              lambda target: resized.save(target, pil_format, quality=quality))
+                sources.setdefault(mimetype, []).append((f'{derived}/{variant}', width))
+
+    written = {'digest': digest, 'widths': list(widths),
+               'sources': {mimetype: sorted(candidates, key=lambda c: c[1]) for mimetype, candidates in sources.items()}}
+    _write_atomic(path, lambda target: _dump_json(written, target))
+
+    if previous:
+        current = {name for candidates in written['sources'].values() for name, _ in candidates}
+        for candidates in previous['sources'].values():
+            for name, _ in candidates:
+                if name not in current:
+                    try:
+                        os.remove(os.path.join(static_folder, name))
+                    except OSError:
+                        pass
+    return written
+
+
+def _dump_json(data: dict, path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+class ImagePipeline:
+    """Queues resizing jobs on a bounded process pool and answers the templates' srcset lookups"""
+
+    def __init__(self) -> None:
+        self.static_folder = ''
+        self.derived = 'derived'
+        self.widths: tuple[int, ...] = ()
+        self.formats: tuple[str, ...] = ()
+        self.quality = 75
+        self.workers = 2
+        self.max_pending = 64
+        self.ttl = 0
+        self.logger = None
+        self.generated = 0
+        self.dropped = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+        # srcsets by image filename, with when the sidecar was last checked and its digest
+        self._sources: dict[str, tuple[float, str | None, list]] = {}
+
+    def init_app(self, app) -> None:
+        self.static_folder = app.static_folder or ''
+        self.derived = app.config['IMAGE_FOLDER'].strip('/')
+        self.widths = app.config['IMAGE_WIDTHS']
+        self.quality = app.config['IMAGE_QUALITY']
+        self.workers = app.config['IMAGE_WORKERS']
+        self.max_pending = app.config['IMAGE_MAX_PENDING']
+        self.ttl = app.config['IMAGE_SOURCES_TTL']
+        self.logger = app.logger
+        self.formats = tuple(name for name in app.config['IMAGE_FORMATS']
+                             if name in FORMATS and features.check(name))
+        app.jinja_env.globals['image_sources'] = self.sources
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.formats and self.widths)
+
+    def resizable(self, filename: str | None) -> str | None:
+        """The filename of an existing image inside the static folder, None for anything else"""
+        if not filename or os.path.splitext(filename)[1].lower() not in RESIZABLE_EXTENSIONS:
+            return None
+        filename = filename.lstrip('/')
+        path = safe_join(self.static_folder, filename)
+        return filename if path is not None and os.path.isfile(path) else None
+
+    def job(self, filename: str) -> tuple:
+        return self.static_folder, self.derived, filename, self.widths, self.formats, self.quality
+
+    def submit(self, filename: str | None, keys: Iterable[str] = ()) -> bool:
+        """
+        Queue the variants of an image, announcing `keys` as changed once they are written so cached
+        pages pick them up. Jobs beyond IMAGE_MAX_PENDING are dropped, `flask assets images` catches up.
+        """
+        filename = self.resizable(filename) if self.enabled else None
+        if filename is None:
+            return False
+        keys = frozenset(keys)
+        with self._lock:
+            if filename in self._pending:
+                return False
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                self.logger.warning(f'Image queue full, skipped variants of {filename}')
+                return False
+            self._pending.add(filename)
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            future = self._executor.submit(write_variants, *self.job(filename))
+        future.add_done_callback(lambda done: self._finished(filename, keys, done))
+        return True
+
+    def _finished(self, filename: str, keys: frozenset[str], future) -> None:
+        from app.events import content_changed
+
+        with self._lock:
+            self._pending.discard(filename)
+        try:
+            written = future.result()
+        except Exception as e:
+            self.logger.error(f'Could not resize {filename}: {e}')
+            return
+        if written is not None:
+            self.generated += 1
+            self._sources.pop(filename, None)
+            if keys:
+                content_changed.send(self, keys=keys)
+
+    def generate(self, filenames: Iterable[str], force: bool = False) -> Iterator[tuple[str, bool | None]]:
+        """
+        Write the variants of many images on the pool and wait for them, yielding (filename, written)
+        with written None for images that could not be resized.
+        """
+        filenames = sorted({name for name in map(self.resizable, filenames) if name})
+        if force:
+            for filename in filenames:
+                try:
+                    os.remove(sidecar_path(os.path.join(self.static_folder, self.derived), filename))
+                except OSError:
+                    pass
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [(filename, executor.submit(write_variants, *self.job(filename))) for filename in filenames]
+            for filename, future in futures:
+                try:
+                    written = future.result()
+                except Exception as e:
+                    self.logger.error(f'Could not resize {filename}: {e}')
+                    yield filename, None
+                    continue
+                self._sources.pop(filename, None)
+                yield filename, written is not None
+
+    def sources(self, filename: str | None) -> list[tuple[str, str]]:
+        """(mimetype, srcset) of the variants of an image, preferred format first, empty if there are none yet"""
+        if not filename or not self.formats:
+            return []
+        filename = filename.lstrip('/')
+        now = time()
+        cached = self._sources.get(filename)
+        if cached is not None and (not self.ttl or now - cached[0] < self.ttl):
+            return cached[2]
+
+        name = f'{self.derived}/{filename}.json'
+        path = os.path.join(self.static_folder, name)
+        if os.path.isfile(path):
+            digest = file_digest(path)
+            if asset_manifest.digests.get(name) != digest:
+                asset_manifest.add(name)
+        else:
+            digest = None
+        if cached is not None and cached[1] == digest:
+            sources = cached[2]
+        else:
+            sidecar = (read_sidecar(path) if digest is not None else None) or {'sources': {}}
+            for candidates in sidecar['sources'].values():
+                for variant, _ in candidates:
+                    if variant not in asset_manifest.digests:
+                        asset_manifest.add(variant)
+            sources = [
+                (mimetype, ', '.join(f'{asset_url(variant)} {width}w' for variant, width in candidates))
+                for mimetype, candidates in sidecar['sources'].items()
+            ]
+        self._sources[filename] = (now, digest, sources)
+        return sources
+
+    def stats(self) -> dict:
+        return {'formats': list(self.formats), 'pending': len(self._pending), 'generated': self.generated, 'dropped': self.dropped}
+
+
+image_pipeline = ImagePipeline()
@@ -1,8 +1,103 @@
+"""
+Rendering of user content (post and section bodies) as Jinja templates.
+
+This runs on the write path: bodies are rendered once when they are saved, and the stored HTML
+(`body_html`) is what pages show. Reads only render here as a fallback, for rows without stored HTML
+until `flask content render` fills it in. The compiled template cache therefore speeds up saving
+and re-rendering content, its hit and miss counts are about writes, not page views.
+"""
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock
+
+from jinja2 import Environment, Template
 from markupsafe import Markup
-from flask import render_template_string
+from flask import current_app
+
+
+class TemplateCache:
+    """
+    Bounded LRU cache of compiled templates for user content, keyed by a hash of the source.
+    Compiling is far more expensive than rendering, `flask content render --force` re-renders bodies
+    that did not change and only compiles each distinct one once.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self._templates: OrderedDict[tuple[int, str], Template] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app) -> None:
+        self.maxsize = app.config['TEMPLATE_CACHE_SIZE']
+
+    @staticmethod
+    def _key(env: Environment, source: str) -> tuple[int, str]:
+        return id(env), sha256(source.encode('utf-8')).hexdigest()
+
+    def get(self, env: Environment, source: str) -> Template:
+        """Get the compiled template for this source, compiling it on a miss"""
+        key = self._key(env, source)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return template
+            self.misses += 1
+
+        # Compile outside the lock, a duplicate compile on a race is harmless
+        template = env.from_string(source)
+        with self._lock:
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.maxsize:
+                self._templates.popitem(last=False)
+                self.evictions += 1
+        return template
+
+    def discard(self, env: Environment, source: str) -> None:
+        """Drop the compiled template for this source, if cached"""
+        with self._lock:
+            self._templates.pop(self._key(env, source), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._templates),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+template_cache = TemplateCache()
+
+
+def render_content(content: str) -> str:
+    """Render user content as a Jinja template, reusing the compiled template when possible."""
+    app = current_app._get_current_object() # type: ignore[attr-defined]
+    template = template_cache.get(app.jinja_env, content)
+    context: dict = {}
+    app.update_template_context(context)
+
+    return template.render(context)
+
+
+def forget_content(content: str) -> None:
+    """Invalidate the compiled template of content that is being replaced."""
+    template_cache.discard(current_app.jinja_env, content)
+
 
 def jinja_markdown(content: str) -> Markup:
     """Renders markdown, then passes the result back through Jinja for rendering."""
-    rendered_content = render_template_string(content)
-    
+    rendered_content = render_content(content)
+
     return Markup(rendered_content)
@@ -0,0 +1,20 @@
+import base64
+import json
+
+
+def encode_cursor(*values) -> str:
+    """Opaque, URL-safe cursor for keyset pagination"""
+    raw = json.dumps(values, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str | None) -> list | None:
+    """Values of a cursor made by encode_cursor, or None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        return None
+    return values if isinstance(values, list) else None
@@ -0,0 +1,172 @@
+"""
+Token-bucket rate limiting for the API.
+
+Every client gets a bucket of RATE_LIMIT tokens that refills continuously over RATE_WINDOW seconds,
+so a bucket is just two numbers (tokens left and when they were counted) and a check is O(1).
+A bucket that has been idle for a whole window is full again and can be forgotten. Two stores are
+available:
+    memory: an in-process LRU of buckets, every gunicorn worker limits on its own
+    sqlite: buckets in a SQLite file, so all workers on a host share the same limit
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from time import time
+from typing import NamedTuple
+
+
+class Bucket(NamedTuple):
+    tokens: float
+    updated_at: float
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    # Seconds until the bucket is full again, and until the request can be retried if it was refused
+    reset_after: float
+    retry_after: float
+
+
+class MemoryStore:
+    """In-process LRU of buckets, dropping the least recently seen clients past maxsize"""
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, Bucket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, key: str, take) -> RateLimitResult:
+        with self._lock:
+            bucket, result = take(self._buckets.get(key))
+            self._buckets[key] = bucket
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return result
+
+    def prune(self, before: float) -> int:
+        with self._lock:
+            idle = [key for key, bucket in self._buckets.items() if bucket.updated_at < before]
+            for key in idle:
+                del self._buckets[key]
+            return len(idle)
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteStore:
+    """Buckets in a SQLite file shared by all workers, updated in one immediate transaction per check"""
+
+    def __init__(self, path: str, maxsize: int = 10000) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS bucket (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_bucket_updated_at ON bucket (updated_at);
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def update(self, key: str, take) -> RateLimitResult:
+        conn = self._connect()
+        # Take the write lock before reading, so two workers never spend the same token
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated_at FROM bucket WHERE key = ?', (key,)).fetchone()
+            bucket, result = take(Bucket(*row) if row else None)
+            conn.execute('INSERT OR REPLACE INTO bucket (key, tokens, updated_at) VALUES (?, ?, ?)',
+                         (key, bucket.tokens, bucket.updated_at))
+            if row is None:
+                conn.execute('DELETE FROM bucket WHERE key IN (SELECT key FROM bucket ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+                             (self.maxsize,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return result
+
+    def prune(self, before: float) -> int:
+        return self._connect().execute('DELETE FROM bucket WHERE updated_at < ?', (before,)).rowcount
+
+    def size(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM bucket').fetchone()[0]
+
+
+class RateLimiter:
+    """Allows `limit` requests per `window` seconds per client, in bursts of at most `limit`"""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.limit = 100
+        self.window = 60.0
+        self.store: MemoryStore | SQLiteStore = MemoryStore()
+        self.refused = 0
+        self._last_prune = time()
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config['ENABLE_RATE_LIMITING']
+        self.limit = app.config['RATE_LIMIT']
+        self.window = float(app.config['RATE_WINDOW'])
+        if app.config['RATE_LIMIT_STORAGE'] == 'sqlite':
+            self.store = SQLiteStore(app.config['RATE_LIMIT_PATH'], app.config['RATE_LIMIT_MAX_KEYS'])
+        else:
+            self.store = MemoryStore(app.config['RATE_LIMIT_MAX_KEYS'])
+
+    @property
+    def rate(self) -> float:
+        """Tokens refilled per second"""
+        return self.limit / self.window
+
+    def hit(self, key: str, cost: int = 1) -> RateLimitResult:
+        """Spend `cost` tokens from the bucket of a client, if it has that many left"""
+        now = time()
+
+        def take(bucket: Bucket | None) -> tuple[Bucket, RateLimitResult]:
+            tokens = self.limit if bucket is None else min(self.limit, bucket.tokens + (now - bucket.updated_at) * self.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            retry_after = 0.0 if allowed else (min(cost, self.limit) - tokens) / self.rate
+            result = RateLimitResult(allowed, self.limit, int(tokens), (self.limit - tokens) / self.rate, retry_after)
+            return Bucket(tokens, now), result
+
+        result = self.store.update(key, take)
+        if not result.allowed:
+            self.refused += 1
+        if now - self._last_prune > self.window:
+            # Buckets idle for a whole window are full again, the same as having no bucket
+            self._last_prune = now
+            self.store.prune(now - self.window)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            'store': type(self.store).__name__,
+            'size': self.store.size(),
+            'limit': self.limit,
+            'window': self.window,
+            'refused': self.refused,
+        }
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,156 @@
+"""
+Full-text search over blogposts and projects.
+
+On SQLite the documents live in an FTS5 virtual table ranked with bm25(), on MySQL/MariaDB in a
+regular table with a FULLTEXT index. Both are queried through the same interface, and results are
+paged with a (score, rowid) keyset cursor where a lower score is a better match.
+"""
+import re
+from typing import NamedTuple
+
+from markupsafe import Markup, escape
+from sqlalchemy import text
+
+TABLE = 'search_document'
+COLUMNS = ('title', 'subtitle', 'extract', 'body', 'keywords')
+
+# Relative weight of a match in each column, kind and entity_id are not searched
+WEIGHTS = (0.0, 0.0, 10.0, 5.0, 3.0, 1.0, 2.0)
+
+SNIPPET_START, SNIPPET_END = '\x02', '\x03'
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+class SearchResult(NamedTuple):
+    kind: str
+    entity_id: int
+    score: float
+    rowid: int
+    snippet: str
+
+    @property
+    def highlighted(self) -> Markup:
+        """The snippet as HTML, with the matched terms marked"""
+        return Markup(str(escape(self.snippet)).replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>'))
+
+
+def _dialect(session) -> str:
+    return session.get_bind().dialect.name
+
+
+def _match_expression(query: str) -> str | None:
+    """Quote every term for FTS5, so user input cannot inject query syntax, and prefix-match the last"""
+    tokens = TOKEN_PATTERN.findall(query)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def create_table(connection) -> None:
+    """
+    Create the search table if it does not exist yet. It is not a model, db.create_all() creates it
+    through a hook in app/models.py, the migrations with the same statements.
+    """
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            f"kind UNINDEXED, entity_id UNINDEXED, {', '.join(COLUMNS)}, tokenize='porter unicode61')"
+        ))
+        return
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+        "id INTEGER NOT NULL AUTO_INCREMENT, kind VARCHAR(16) NOT NULL, entity_id INTEGER NOT NULL, "
+        "title VARCHAR(128) NOT NULL, subtitle VARCHAR(128) NOT NULL, extract VARCHAR(512) NOT NULL, "
+        "body TEXT NOT NULL, keywords TEXT NOT NULL, PRIMARY KEY (id), "
+        "CONSTRAINT uq_search_document UNIQUE (kind, entity_id), "
+        f"FULLTEXT INDEX ix_search_document_fulltext ({', '.join(COLUMNS)}))"
+    ))
+
+
+def drop_table(connection) -> None:
+    connection.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+
+
+def index_document(session, kind: str, entity_id: int, fields: dict[str, str]) -> None:
+    """Add or replace the search document of an entity"""
+    index_documents(session, [(kind, entity_id, fields)])
+
+
+def index_documents(session, documents: list[tuple[str, int, dict[str, str]]]) -> None:
+    """Add or replace the search documents of many entities, with one executemany per statement"""
+    if not documents:
+        return
+    remove_documents(session, [(kind, entity_id) for kind, entity_id, _ in documents])
+    session.execute(text(
+        f"INSERT INTO {TABLE} (kind, entity_id, {', '.join(COLUMNS)}) "
+        f"VALUES (:kind, :entity_id, {', '.join(':' + column for column in COLUMNS)})"
+    ), [{'kind': kind, 'entity_id': entity_id, **{column: fields.get(column) or '' for column in COLUMNS}}
+        for kind, entity_id, fields in documents])
+
+
+def remove_document(session, kind: str, entity_id: int) -> None:
+    remove_documents(session, [(kind, entity_id)])
+
+
+def remove_documents(session, keys: list[tuple[str, int]]) -> None:
+    if keys:
+        session.execute(text(f"DELETE FROM {TABLE} WHERE kind = :kind AND entity_id = :entity_id"),
+                        [{'kind': kind, 'entity_id': entity_id} for kind, entity_id in keys])
+
+
+def clear(session) -> None:
+    session.execute(text(f"DELETE FROM {TABLE}"))
+
+
+def search(session, query: str, limit: int = 20, after: list | None = None) -> list[SearchResult]:
+    """
+    Ranked matches for a query, after the (score, rowid) of the last result of the previous page.
+    A malformed `after` is ignored and the first page is returned.
+    """
+    if _dialect(session) == 'sqlite':
+        match = _match_expression(query)
+        if match is None:
+            return []
+        ranked = (
+            f"SELECT kind, entity_id, bm25({TABLE}, {', '.join(map(str, WEIGHTS))}) AS score, rowid, "
+            f"snippet({TABLE}, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 16) AS snippet "
+            f"FROM {TABLE} WHERE {TABLE} MATCH :query"
+        )
+        params: dict = {'query': match, 'limit': limit}
+    else:
+        if not TOKEN_PATTERN.search(query):
+            return []
+        against = f"MATCH ({', '.join(COLUMNS)}) AGAINST (:query IN NATURAL LANGUAGE MODE)"
+        ranked = (
+            f"SELECT kind, entity_id, -{against} AS score, id AS rowid, extract AS snippet "
+            f"FROM {TABLE} WHERE {against}"
+        )
+        params = {'query': query, 'limit': limit}
+
+    keyset = ''
+    if after is not None and len(after) == 2:
+        try:
+            score, rowid = float(after[0]), int(after[1])
+        except (TypeError, ValueError):
+            pass
+        else:
+            keyset = 'WHERE score > :score OR (score = :score AND rowid > :rowid)'
+            params.update(score=score, rowid=rowid)
+    rows = session.execute(text(
+        f"SELECT kind, entity_id, score, rowid, snippet FROM ({ranked}) AS ranked {keyset} "
+        f"ORDER BY score, rowid LIMIT :limit"
+    ), params)
+
+    results = [SearchResult(*row) for row in rows]
+    if _dialect(session) != 'sqlite':
+        results = [result._replace(snippet=_highlight(result.snippet, query)) for result in results]
+    return results
+
+
+def _highlight(content: str, query: str) -> str:
+    """Mark the query terms in a text, for databases without a snippet function"""
+    terms = {token.lower() for token in TOKEN_PATTERN.findall(query)}
+    return TOKEN_PATTERN.sub(lambda m: f'{SNIPPET_START}{m.group(0)}{SNIPPET_END}' if m.group(0).lower() in terms else m.group(0), content)
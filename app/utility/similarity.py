@@ -0,0 +1,202 @@
+"""
+Content-similarity index for suggesting related content.
+
+Documents are turned into hashed bag-of-words vectors (sublinear term frequency, weighted by inverse
+document frequency and L2 normalised) and kept as rows of one float32 matrix, so the most similar
+documents are found with a single matrix-vector product. Every document is indexed together with
+a version (when it last changed), so an index loaded from disk, or kept by a worker that did not
+handle a write, can tell which of its documents are stale.
+"""
+import os
+import re
+import threading
+import zlib
+from time import time
+from typing import Callable, Hashable, Iterable
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r'[^\W\d_]{3,}')
+
+STOP_WORDS = frozenset("""
+    the and for are but not you all any can had her was one our out has him his how its may new now
+    old see two way who did get got let put say she too use that with have this will your from they
+    been were what when where which while would there their them then than into more most some such
+    only over also just like very about after again could other these those being because should
+""".split())
+
+
+class SimilarityIndex:
+    """Hashed TF-IDF vectors of all documents, re-indexing only the documents that changed"""
+
+    def __init__(self, dimensions: int = 256) -> None:
+        self.dimensions = dimensions
+        self.ttl: float = 0
+        self._lock = threading.Lock()
+        self._dirty: set[Hashable] = set()
+        self._reset()
+
+    def init_app(self, app) -> None:
+        self.ttl = app.config['SIMILARITY_INDEX_TTL']
+        if app.config['SIMILARITY_DIMENSIONS'] != self.dimensions:
+            self.dimensions = app.config['SIMILARITY_DIMENSIONS']
+            self._reset()
+
+    def _reset(self) -> None:
+        self._keys: list[Hashable] = []
+        self._rows: dict[Hashable, int] = {}
+        self._tf = np.zeros((0, self.dimensions), dtype=np.float32)
+        self._matrix = np.zeros((0, self.dimensions), dtype=np.float32)
+        self._df = np.zeros(self.dimensions, dtype=np.int64)
+        self._versions: dict[Hashable, str] = {}
+        self._synced_at: float | None = None
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def vectorize(self, text: str) -> np.ndarray:
+        """Sublinear term frequencies of the hashed tokens of a text"""
+        tokens = [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+        buckets = np.fromiter((zlib.crc32(t.encode('utf-8')) % self.dimensions for t in tokens), dtype=np.int64, count=len(tokens))
+        counts = np.bincount(buckets, minlength=self.dimensions).astype(np.float32)
+        nonzero = counts > 0
+        counts[nonzero] = 1 + np.log(counts[nonzero])
+        return counts
+
+    def _idf(self) -> np.ndarray:
+        return (np.log((1 + len(self._keys)) / (1 + self._df)) + 1).astype(np.float32)
+
+    @staticmethod
+    def _normalise(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
+
+    def build(self, documents: Iterable[tuple[Hashable, str]], versions: dict[Hashable, str] | None = None) -> None:
+        """Index all documents from scratch, versions are taken before the documents are loaded"""
+        keys, vectors = [], []
+        for key, text in documents:
+            keys.append(key)
+            vectors.append(self.vectorize(text))
+        with self._lock:
+            self._reset()
+            self._keys = keys
+            self._rows = {key: row for row, key in enumerate(keys)}
+            self._tf = np.vstack(vectors) if vectors else np.zeros((0, self.dimensions), dtype=np.float32)
+            self._df = (self._tf > 0).sum(axis=0)
+            self._matrix = self._normalise(self._tf * self._idf())
+            self._versions = dict(versions or {})
+            self._synced_at = time() if versions is not None else None
+            self.loaded = True
+
+    @property
+    def expired(self) -> bool:
+        """Whether the versions of the documents should be checked again, see sync"""
+        return self._synced_at is None or (bool(self.ttl) and time() - self._synced_at >= self.ttl)
+
+    def sync(self, versions: dict[Hashable, str]) -> None:
+        """
+        Queue the documents whose version differs from the indexed one, new documents and the ones
+        that are gone. Catches up with writes other workers handled, and with a stale stored index.
+        """
+        with self._lock:
+            stale = {key for key, version in versions.items() if self._versions.get(key) != version}
+            stale.update(key for key in self._rows if key not in versions)
+            self._dirty |= stale
+            self._versions = dict(versions)
+            self._synced_at = time()
+
+    def mark_dirty(self, keys: Iterable[Hashable]) -> None:
+        """Queue documents to be re-indexed before the next query"""
+        with self._lock:
+            self._dirty.update(keys)
+
+    def refresh(self, loader: Callable[[set], Iterable[tuple[Hashable, str]]]) -> None:
+        """
+        Re-index the queued documents, loader returns the ones that still exist. The document
+        frequencies change with them, so every row is weighted again with the new IDF.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+        documents = dict(loader(dirty))
+        vectors = [self.vectorize(text) for text in documents.values()]
+        with self._lock:
+            for key in dirty:
+                self._remove(key)
+            for key in documents:
+                self._rows[key] = len(self._keys)
+                self._keys.append(key)
+            if vectors:
+                tf = np.vstack(vectors)
+                self._df += (tf > 0).sum(axis=0)
+                self._tf = np.vstack([self._tf, tf])
+            self._matrix = self._normalise(self._tf * self._idf())
+
+    def _remove(self, key: Hashable) -> None:
+        # Swap the last row into the removed one, so rows stay contiguous, the matrix is weighted afterwards
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        self._df -= self._tf[row] > 0
+        last = len(self._keys) - 1
+        if row != last:
+            last_key = self._keys[last]
+            self._keys[row] = last_key
+            self._rows[last_key] = row
+            self._tf[row] = self._tf[last]
+        self._keys.pop()
+        self._tf = self._tf[:last]
+
+    def similar(self, key: Hashable, k: int = 5, min_score: float = 0.1) -> list[tuple[Hashable, float]]:
+        """The k documents most similar to a document, by cosine similarity"""
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None or len(self._keys) < 2:
+                return []
+            scores = self._matrix @ self._matrix[row]
+            scores[row] = -1
+            k = min(k, len(scores) - 1)
+            top = np.argpartition(scores, -k)[-k:]
+            top = top[np.argsort(scores[top])[::-1]]
+            return [(self._keys[i], float(scores[i])) for i in top if scores[i] >= min_score]
+
+    def save(self, path: str, format_key: Callable[[Hashable], str]) -> None:
+        """Store the index, so workers can load it instead of indexing every document"""
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            keys = np.array([format_key(key) for key in self._keys], dtype=str)
+            versions = np.array([self._versions.get(key, '') for key in self._keys], dtype=str)
+            with open(path, 'wb') as f:
+                np.savez_compressed(f, keys=keys, versions=versions, tf=self._tf, dimensions=self.dimensions)
+
+    def load(self, path: str, parse_key: Callable[[str], Hashable]) -> bool:
+        """
+        Load a stored index, returns False if there is none or it was built with other dimensions.
+        It is checked against the current versions before it is first queried.
+        """
+        if not os.path.exists(path):
+            return False
+        with np.load(path) as data:
+            if int(data['dimensions']) != self.dimensions:
+                return False
+            keys = [parse_key(key) for key in data['keys']]
+            versions = [str(version) for version in data['versions']] if 'versions' in data else []
+            tf = data['tf'].astype(np.float32)
+        with self._lock:
+            self._reset()
+            self._keys = keys
+            self._rows = {key: row for row, key in enumerate(keys)}
+            self._tf = tf
+            self._df = (tf > 0).sum(axis=0)
+            self._matrix = self._normalise(tf * self._idf())
+            self._versions = {key: version for key, version in zip(keys, versions) if version}
+            self.loaded = True
+        return True
+
+
+similarity_index = SimilarityIndex()
@@ -0,0 +1,220 @@
+"""
+Static export of the public site.
+
+`flask site build` renders every public page into SITE_PATH, so a web server can serve them without
+Python; Flask is then only needed for the API and search. Pages are rendered on a process pool, and
+the content keys each page depended on (the same keys the page cache uses, see app/events.py) are
+stored in a manifest. Every committed write appends its changed keys to a journal, and
+`flask site build --incremental` re-renders only the pages whose keys are in it.
+
+Paginated pages are written next to the first one, /blog?cursor=<c> as blog/cursor-<c>/index.html.
+Feeds and sitemaps are written as the files they are named after, feed.xml or sitemap.xml, and are
+rebuilt whenever any post or project changes. The facet pages of one tag, technology or category are
+exported, combined selections (/facets?...) and filtered feeds (/feed.xml?tag=...) are left to Flask.
+URLs in feeds and sitemaps are absolute, on SERVER_NAME if it is set and on SITE_URL otherwise.
+With nginx:
+
+    location / {
+        root <SITE_PATH>;
+        try_files $uri/cursor-$arg_cursor/index.html $uri/index.html $uri$is_args$args @flask;
+    }
+    location ~ ^/static/v/[^/]+/(.+)$ {
+        alias <static folder>/$1;
+        expires max;
+    }
+"""
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterable, Iterator, NamedTuple
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from flask import g
+
+NEXT_LINK = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+# Paths exported as a file of their own name instead of a directory with an index.html
+FILE_PATHS = re.compile(r'^/(feed\.(atom|xml|json)|sitemap(-[\w-]+)?\.xml)$')
+
+# The application a build worker renders with, inherited from the parent process
+_app = None
+# Scheme and host of the exported site, for the absolute URLs in feeds and sitemaps
+_base_url = None
+
+
+class RenderedPage(NamedTuple):
+    path: str
+    status: int
+    tags: tuple[str, ...]
+    next_path: str | None
+
+
+def page_file(path: str) -> str:
+    """File a page is written to, relative to SITE_PATH"""
+    url = urlsplit(path)
+    # The web server looks files up by the decoded path, /tag/C%2B%2B in tag/C++
+    parts = [unquote(part) for part in url.path.split('/') if part]
+    if FILE_PATHS.match(url.path):
+        return os.path.join(*parts)
+    cursor = parse_qs(url.query).get('cursor')
+    if cursor:
+        parts.append(f'cursor-{cursor[0]}')
+    return os.path.join(*parts, 'index.html')
+
+
+def _init_worker(app) -> None:
+    global _app, _base_url
+    from app import db
+    from app.utility.cache import page_cache
+
+    _app = app
+    _base_url = app.config['SITE_URL'] or None
+    # Every page is rendered for real, so its dependencies are recorded, and the connections of the
+    # parent process are never shared with it
+    page_cache.backend = None
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def render_page(path: str, folder: str) -> RenderedPage:
+    """Render one page in a worker and write it, a page that is gone has its file removed"""
+    with _app.test_request_context(path, base_url=_base_url):
+        response = _app.full_dispatch_request()
+        body = response.get_data()
+        tags = tuple(sorted(g.get('cache_tags', set()) | {'navbar'}))
+
+    target = os.path.join(folder, page_file(path))
+    if response.status_code == 200:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temporary = f'{target}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(body)
+        os.replace(temporary, target)
+    elif os.path.exists(target):
+        os.remove(target)
+
+    link = NEXT_LINK.search(response.headers.get('Link', ''))
+    return RenderedPage(path, response.status_code, tags, link.group(1) if link else None)
+
+
+def render_pages(app, paths: Iterable[str], folder: str, workers: int) -> Iterator[RenderedPage]:
+    """Render pages on a process pool, following rel="next" links to the pages after them"""
+    seen = set(paths)
+    # Forked workers inherit the application instead of building their own
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(app,)) as pool:
+        pending = {pool.submit(render_page, path, folder) for path in seen}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                page = future.result()
+                if page.next_path and page.next_path not in seen:
+                    seen.add(page.next_path)
+                    pending.add(pool.submit(render_page, page.next_path, folder))
+                yield page
+
+
+def _read_keys(path: str) -> set[str]:
+    keys = set()
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    keys.update(json.loads(line))
+    except FileNotFoundError:
+        pass
+    return keys
+
+
+def _write_keys(path: str, keys: set[str]) -> None:
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(sorted(keys)) + '\n')
+    os.replace(temporary, path)
+
+
+class StaticSite:
+    """The manifest of exported pages and the journal of content changed since the last build"""
+
+    def __init__(self) -> None:
+        self.folder = ''
+        self.manifest_path = ''
+        self.journal_path = ''
+        self.workers = 4
+
+    def init_app(self, app) -> None:
+        from app.events import content_changed
+
+        self.folder = app.config['SITE_PATH']
+        self.manifest_path = app.config['SITE_MANIFEST_PATH']
+        self.journal_path = app.config['SITE_JOURNAL_PATH']
+        self.workers = app.config['SITE_WORKERS']
+        content_changed.connect(self._on_content_changed, weak=False)
+
+    def _on_content_changed(self, sender, keys: frozenset[str]) -> None:
+        # Nothing to keep up to date until the site has been exported once
+        if not os.path.exists(self.manifest_path):
+            return
+        # One short append per commit, whole lines are never interleaved between processes
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(sorted(keys)) + '\n')
+
+    def load_manifest(self) -> dict[str, list[str]]:
+        """Exported pages and the keys they depend on"""
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save_manifest(self, manifest: dict[str, list[str]]) -> None:
+        directory = os.path.dirname(self.manifest_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        temporary = f'{self.manifest_path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(dict(sorted(manifest.items())), f, indent=0)
+        os.replace(temporary, self.manifest_path)
+
+    def take_journal(self) -> tuple[set[str], str | None]:
+        """
+        Keys changed since the last build and the file holding them, to be removed once the build
+        succeeded. The journal is moved aside first, so writes committed during the build go into a
+        new one, and keys taken by a build that failed are taken again by the next one.
+        """
+        taken, moved = f'{self.journal_path}.building', f'{self.journal_path}.moved'
+        keys = _read_keys(taken) | _read_keys(moved)
+        if os.path.exists(moved):
+            _write_keys(taken, keys)
+            os.remove(moved)
+        try:
+            os.replace(self.journal_path, moved)
+        except FileNotFoundError:
+            pass
+        else:
+            keys |= _read_keys(moved)
+            _write_keys(taken, keys)
+            os.remove(moved)
+        return keys, taken if keys else None
+
+    @staticmethod
+    def affected(manifest: dict[str, list[str]], keys: set[str]) -> set[str]:
+        """Exported pages depending on any of the changed keys, or on every entity of a changed kind"""
+        from app.events import with_any_keys
+
+        keys = with_any_keys(keys)
+        return {path for path, tags in manifest.items() if keys.intersection(tags)}
+
+    def build(self, app, paths: Iterable[str], manifest: dict[str, list[str]]) -> Iterator[RenderedPage]:
+        """Render pages into the manifest, pages answering anything but a 200 are removed from it"""
+        for page in render_pages(app, paths, self.folder, self.workers):
+            if page.status == 200:
+                manifest[page.path] = list(page.tags)
+            else:
+                manifest.pop(page.path, None)
+            yield page
+
+
+static_site = StaticSite()
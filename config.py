@@ -10,9 +10,51 @@ config = configparser.ConfigParser()
 config.read(os.path.join(basedir, 'config.ini'))
 
 class Config(object):
-    RATE_LIMIT = config["DEFAULT"]["RATE_LIMIT"]
-    RATE_WINDOW = config["DEFAULT"]["RATE_WINDOW"]
-    ENABLE_RATE_LIMITING = config["DEFAULT"]["ENABLE_RATE_LIMITING"]
+    RATE_LIMIT = int(config["DEFAULT"]["RATE_LIMIT"])
+    RATE_WINDOW = int(config["DEFAULT"]["RATE_WINDOW"])
+    ENABLE_RATE_LIMITING = config["DEFAULT"]["ENABLE_RATE_LIMITING"].lower() == "true"
+    RATE_LIMIT_STORAGE = config["DEFAULT"].get("RATE_LIMIT_STORAGE", "memory")
+    RATE_LIMIT_MAX_KEYS = int(config["DEFAULT"].get("RATE_LIMIT_MAX_KEYS", "10000"))
+    RATE_LIMIT_PATH = config["DEFAULT"].get("RATE_LIMIT_PATH", os.path.join(basedir, 'cache', 'ratelimit.db'))
+    ASSET_MANIFEST_PATH = config["DEFAULT"].get("ASSET_MANIFEST_PATH", os.path.join(basedir, 'cache', 'assets.json'))
+    FEED_TITLE = config["DEFAULT"].get("FEED_TITLE", "Hagen's Homepage")
+    FEED_SIZE = int(config["DEFAULT"].get("FEED_SIZE", "20"))
+    FEED_CACHE_TTL = int(config["DEFAULT"].get("FEED_CACHE_TTL", "300"))
+    SITEMAP_SIZE = int(config["DEFAULT"].get("SITEMAP_SIZE", "50000"))
+    SITEMAP_CACHE_TTL = int(config["DEFAULT"].get("SITEMAP_CACHE_TTL", "300"))
+    SITE_PATH = config["DEFAULT"].get("SITE_PATH", os.path.join(basedir, 'site'))
+    SITE_URL = config["DEFAULT"].get("SITE_URL", "")
+    SITE_MANIFEST_PATH = config["DEFAULT"].get("SITE_MANIFEST_PATH", os.path.join(basedir, 'cache', 'site.json'))
+    SITE_JOURNAL_PATH = config["DEFAULT"].get("SITE_JOURNAL_PATH", os.path.join(basedir, 'cache', 'site-journal.jsonl'))
+    SITE_WORKERS = int(config["DEFAULT"].get("SITE_WORKERS", "4"))
+    IMAGE_FOLDER = config["DEFAULT"].get("IMAGE_FOLDER", "derived")
+    IMAGE_WIDTHS = tuple(int(width) for width in config["DEFAULT"].get("IMAGE_WIDTHS", "64,320,640,960,1280").split(","))
+    IMAGE_FORMATS = tuple(name.strip().lower() for name in config["DEFAULT"].get("IMAGE_FORMATS", "avif,webp").split(","))
+    IMAGE_QUALITY = int(config["DEFAULT"].get("IMAGE_QUALITY", "75"))
+    IMAGE_WORKERS = int(config["DEFAULT"].get("IMAGE_WORKERS", "2"))
+    IMAGE_MAX_PENDING = int(config["DEFAULT"].get("IMAGE_MAX_PENDING", "64"))
+    IMAGE_SOURCES_TTL = int(config["DEFAULT"].get("IMAGE_SOURCES_TTL", "300"))
+    COMPRESS_MIN_SIZE = int(config["DEFAULT"].get("COMPRESS_MIN_SIZE", "500"))
+    COMPRESS_LEVEL = int(config["DEFAULT"].get("COMPRESS_LEVEL", "6"))
+    API_PAGE_SIZE = int(config["DEFAULT"].get("API_PAGE_SIZE", "20"))
+    BATCH_MAX_OPERATIONS = int(config["DEFAULT"].get("BATCH_MAX_OPERATIONS", "500"))
+    TEMPLATE_CACHE_SIZE = int(config["DEFAULT"].get("TEMPLATE_CACHE_SIZE", "256"))
+    NAVBAR_CACHE_TTL = int(config["DEFAULT"].get("NAVBAR_CACHE_TTL", "300"))
+    RELATED_GRAPH_TTL = int(config["DEFAULT"].get("RELATED_GRAPH_TTL", "300"))
+    FACET_INDEX_TTL = int(config["DEFAULT"].get("FACET_INDEX_TTL", "300"))
+    FACET_PAGE_SIZE = int(config["DEFAULT"].get("FACET_PAGE_SIZE", "20"))
+    ENABLE_SIMILARITY = config["DEFAULT"].get("ENABLE_SIMILARITY", "true").lower() == "true"
+    SIMILARITY_DIMENSIONS = int(config["DEFAULT"].get("SIMILARITY_DIMENSIONS", "256"))
+    SIMILARITY_INDEX_TTL = int(config["DEFAULT"].get("SIMILARITY_INDEX_TTL", "300"))
+    SIMILARITY_INDEX_PATH = config["DEFAULT"].get("SIMILARITY_INDEX_PATH", os.path.join(basedir, 'cache', 'similarity.npz'))
+    ENABLE_SEARCH = config["DEFAULT"].get("ENABLE_SEARCH", "true").lower() == "true"
+    SEARCH_PAGE_SIZE = int(config["DEFAULT"].get("SEARCH_PAGE_SIZE", "20"))
+    BLOG_PAGE_SIZE = int(config["DEFAULT"].get("BLOG_PAGE_SIZE", "10"))
+    PORTFOLIO_PAGE_SIZE = int(config["DEFAULT"].get("PORTFOLIO_PAGE_SIZE", "12"))
+    PAGE_CACHE = config["DEFAULT"].get("PAGE_CACHE", "memory")
+    PAGE_CACHE_SIZE = int(config["DEFAULT"].get("PAGE_CACHE_SIZE", "512"))
+    PAGE_CACHE_TTL = int(config["DEFAULT"].get("PAGE_CACHE_TTL", "300"))
+    PAGE_CACHE_PATH = config["DEFAULT"].get("PAGE_CACHE_PATH", os.path.join(basedir, 'cache', 'pages.db'))
     SECRET_KEY = os.getenv("SECRET_KEY")
     DB_URL_FROM_ENV = os.getenv("DATABASE_URL")
     SQLALCHEMY_DATABASE_URI = DB_URL_FROM_ENV or 'sqlite:///' + os.path.join(basedir, 'devdatabase.db')
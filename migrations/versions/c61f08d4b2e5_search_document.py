@@ -0,0 +1,48 @@
+"""search document
+
+Revision ID: c61f08d4b2e5
+Revises: 9d3a6c51e07b
+Create Date: 2026-10-18 14:02:27.104633
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c61f08d4b2e5'
+down_revision = '9d3a6c51e07b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite gets an FTS5 virtual table, MySQL/MariaDB a regular table with a FULLTEXT index
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE search_document USING fts5("
+            "kind UNINDEXED, entity_id UNINDEXED, title, subtitle, extract, body, keywords, "
+            "tokenize='porter unicode61')"
+        )
+        return
+
+    op.create_table('search_document',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=128), nullable=False),
+    sa.Column('subtitle', sa.String(length=128), nullable=False),
+    sa.Column('extract', sa.String(length=512), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('keywords', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('kind', 'entity_id', name='uq_search_document')
+    )
+    op.create_index('ix_search_document_fulltext', 'search_document',
+                    ['title', 'subtitle', 'extract', 'body', 'keywords'], mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_index('ix_search_document_fulltext', table_name='search_document')
+    op.drop_table('search_document')
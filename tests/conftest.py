@@ -0,0 +1,53 @@
+import pytest
+
+from app import create_app, db
+from app.feeds.cache import feed_cache
+from app.feeds.sitemap import sitemap_cache
+from app.main.navbar import navbar
+from app.models import related_graph, facet_index
+from app.utility.cache import page_cache
+from app.utility.similarity import similarity_index
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SECRET_KEY = 'test'
+    SERVER_NAME = 'localhost'
+    ENABLE_RATE_LIMITING = False
+    ENABLE_SIMILARITY = False
+    PAGE_CACHE = None
+    # No resizing, so running the tests never writes variants into app/static
+    IMAGE_FORMATS = ()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # The application writes its logs relative to the working directory
+    monkeypatch.chdir(tmp_path)
+
+    class Configured(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+        PAGE_CACHE_PATH = str(tmp_path / 'pages.db')
+        SITE_MANIFEST_PATH = str(tmp_path / 'site.json')
+        SITE_JOURNAL_PATH = str(tmp_path / 'site-journal.jsonl')
+        SIMILARITY_INDEX_PATH = str(tmp_path / 'similarity.npz')
+
+    app = create_app(Configured)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    page_cache.backend = None
+    # Snapshots live for the process, the next test's database must not be answered from this one
+    for snapshot in (related_graph, facet_index, navbar):
+        snapshot.invalidate()
+    feed_cache.clear()
+    similarity_index.loaded = False
+    sitemap_cache.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
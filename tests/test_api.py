@@ -0,0 +1,60 @@
+import pytest
+
+HEADERS = {'X-API-Key': 'test'}
+
+POST = {'title': 'Post', 'body': 'Body', 'extract': 'Extract', 'slug': 'post', 'image': 'img/blog/post.png'}
+PROJECT = {'title': 'Project', 'subtitle': 'Subtitle', 'extract': 'Extract', 'slug': 'project', 'features': [], 'sections': []}
+
+
+def test_project_update_keeps_its_slug(client):
+    project_id = client.post('/api/projects', headers=HEADERS, json=PROJECT).json['id']
+    client.post('/api/projects', headers=HEADERS, json={**PROJECT, 'title': 'Other', 'slug': 'other'})
+    # A slug another project has is not a conflict, the slug is not written at all
+    response = client.patch(f'/api/projects/{project_id}', headers=HEADERS, json={'slug': 'other', 'subtitle': 'Changed'})
+    assert response.status_code == 200
+    project = client.get(f'/api/projects/{project_id}').json
+    assert (project['slug'], project['subtitle']) == ('project', 'Changed')
+
+
+@pytest.mark.parametrize('changes, error', [
+    ({'title': 'Other'}, 'Missing required field: body'),
+    ({'title': 'Other', 'body': 'Body', 'extract': 'Extract', 'image': 'i.png'}, 'Missing required field: slug'),
+    ({'title': 'Other'} | {key: POST[key] for key in ('body', 'extract', 'slug', 'image')}, 'Slug already exists'),
+    ({'slug': 'other'} | {key: POST[key] for key in ('title', 'body', 'extract', 'image')}, 'Title already exists'),
+])
+def test_post_create_errors(client, changes, error):
+    assert client.post('/api/posts', headers=HEADERS, json=POST).status_code == 201
+    response = client.post('/api/posts', headers=HEADERS, json=changes)
+    assert response.status_code == 400
+    assert response.json['error'] == error
+
+
+def test_batch_is_all_or_nothing(client):
+    client.post('/api/posts', headers=HEADERS, json=POST)
+    response = client.post('/api/batch', headers=HEADERS, json={'operations': [
+        {'action': 'create', 'type': 'post', 'data': {**POST, 'title': 'New', 'slug': 'new'}},
+        {'action': 'create', 'type': 'post', 'data': {**POST, 'title': 'Newer'}},
+    ]})
+    assert response.status_code == 400
+    assert [error['index'] for error in response.json['errors']] == [1]
+    assert len(client.get('/api/posts').json['results']) == 1
+
+    response = client.post('/api/batch', headers=HEADERS, json={'operations': [
+        {'action': 'create', 'type': 'post', 'data': {**POST, 'title': 'New', 'slug': 'new'}},
+        {'action': 'update', 'type': 'post', 'id': 1, 'data': {'title': 'Renamed'}},
+    ]})
+    assert response.status_code == 200
+    assert [result['status'] for result in response.json['results']] == [201, 200]
+    assert {post['title'] for post in client.get('/api/posts').json['results']} == {'New', 'Renamed'}
+
+
+@pytest.mark.parametrize('url', ['/api/posts', '/api/projects'])
+@pytest.mark.parametrize('limit, expected', [(0, 1), (-1, 1), (2, 2), (1000, 3)])
+def test_list_limit_is_clamped(client, url, limit, expected):
+    for i in range(3):
+        client.post('/api/posts', headers=HEADERS, json={**POST, 'title': f'Post {i}', 'slug': f'post-{i}'})
+        client.post('/api/projects', headers=HEADERS, json={**PROJECT, 'title': f'Project {i}', 'slug': f'project-{i}'})
+    response = client.get(f'{url}?limit={limit}')
+    assert response.status_code == 200
+    assert len(response.json['results']) == expected
+    assert (response.json['next_cursor'] is None) == (expected == 3)
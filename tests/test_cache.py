@@ -0,0 +1,23 @@
+import pytest
+
+from app.utility import cache
+from app.utility.cache import CachedPage, MemoryBackend, SQLiteBackend
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBackend(ttl=60)
+    return SQLiteBackend(str(tmp_path / 'pages.db'), ttl=60)
+
+
+def test_pages_expire_after_the_ttl(backend, monkeypatch):
+    now = cache.time()
+    monkeypatch.setattr(cache, 'time', lambda: now)
+    backend.set('/blog', CachedPage(b'Blog', 'text/html'), {'blogpost'})
+    assert backend.get('/blog').body == b'Blog'
+
+    monkeypatch.setattr(cache, 'time', lambda: now + 60)
+    assert backend.get('/blog') is None
+    backend.set('/portfolio', CachedPage(b'Portfolio', 'text/html'), {'project'})
+    assert backend.size() == 1
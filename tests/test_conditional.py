@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import pytest
+from flask import template_rendered
+from sqlalchemy import event
+
+from app import db
+from app.models import BlogPost, Project, RelatedContent, Tag, ContentType
+
+# Older than anything written during a test, so every write moves the validators forward
+PAST = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def content(app):
+    db.session.add_all(BlogPost(title=f'Post {i}', body='Body', extract='Extract', image='img/blog/post.png', slug=f'post-{i}')
+                       for i in range(2))
+    db.session.add(Project(title='Project', subtitle='Subtitle', extract='Extract', slug='project', tags=[Tag(title='Tag')]))
+    db.session.commit()
+    for model in (BlogPost, Project):
+        db.session.execute(db.update(model).values(updated_at=PAST))
+    db.session.commit()
+
+
+def revalidate(client, url, **headers):
+    first = client.get(url)
+    return lambda: client.get(url, headers={'If-None-Match': first.headers['ETag'],
+                                            'If-Modified-Since': first.headers['Last-Modified'], **headers}).status_code
+
+
+def test_every_page_has_its_own_etag(client, content):
+    etags = {url: client.get(url).headers['ETag'] for url in ('/', '/blog', '/portfolio', '/blog/1-post-0', '/blog/2-post-1')}
+    assert len(set(etags.values())) == len(etags)
+
+
+def test_last_modified_is_when_the_content_changed(client, content):
+    assert client.get('/blog').headers['Last-Modified'] == 'Thu, 01 Jan 2026 00:00:00 GMT'
+
+
+def test_not_modified_is_answered_before_rendering(client, content):
+    etag = client.get('/blog').headers['ETag']
+    statements, templates = [], []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    rendered = lambda sender, template, context, **extra: templates.append(template)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        with template_rendered.connected_to(rendered):
+            response = client.get('/blog', headers={'If-None-Match': etag})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code == 304
+    assert len(statements) == 1
+    assert templates == []
+
+
+def test_unrelated_edit_keeps_the_page(client, content):
+    status = revalidate(client, '/blog/1-post-0')
+    post = db.session.get(BlogPost, 2)
+    post.body = 'Changed'
+    db.session.commit()
+    assert status() == 304
+
+
+def test_related_link_changes_both_ends(client, content):
+    post, project = revalidate(client, '/blog/1-post-0'), revalidate(client, '/portfolio/1-project')
+    db.session.add(RelatedContent(ContentType.BLOG, 1, ContentType.PROJECT, 1))
+    db.session.commit()
+    assert (post(), project()) == (200, 200)
+
+
+def test_renamed_tag_changes_the_pages_showing_it(client, content):
+    post, project = revalidate(client, '/blog/1-post-0'), revalidate(client, '/portfolio/1-project')
+    db.session.get(Tag, 1).title = 'Renamed'
+    db.session.commit()
+    assert (post(), project()) == (304, 200)
+
+
+def test_deleting_the_newest_post_moves_last_modified_forward(client, content):
+    last_modified = client.get('/blog').headers['Last-Modified']
+    db.session.delete(db.session.get(BlogPost, 2))
+    db.session.commit()
+    response = client.get('/blog', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 200
+    assert b'Post 1' not in response.data
@@ -0,0 +1,59 @@
+from sqlalchemy import text
+
+from app import db
+from app.feeds import cache, sitemap
+from app.models import BlogPost
+
+
+def add_post(title):
+    db.session.add(BlogPost(title=title, body='Body', extract='Extract', image='img/blog/post.png', slug='post'))
+    db.session.commit()
+
+
+def test_feed_dropped_on_a_write(client):
+    add_post('First')
+    assert b'First' in client.get('/feed.xml').data
+    add_post('Second')
+    assert b'Second' in client.get('/feed.xml').data
+
+
+def test_feed_rebuilt_after_another_workers_write(client, monkeypatch):
+    monkeypatch.setattr(cache.feed_cache, 'ttl', 60)
+    add_post('First')
+    client.get('/feed.xml')
+    # Written on a connection of its own, like another worker would, so no signal reaches this one
+    with db.engine.begin() as connection:
+        connection.execute(text("UPDATE blog_post SET title = 'Renamed'"))
+    assert b'Renamed' not in client.get('/feed.xml').data
+
+    now = cache.time()
+    monkeypatch.setattr(cache, 'time', lambda: now + 60)
+    assert b'Renamed' in client.get('/feed.xml').data
+
+
+def test_sitemaps_page_on_id_ranges(client, monkeypatch):
+    monkeypatch.setattr(sitemap.sitemap_cache, 'size', 2)
+    for title in ('First', 'Second', 'Third'):
+        add_post(title)
+    db.session.delete(db.session.get(BlogPost, 1))
+    db.session.commit()
+
+    index = client.get('/sitemap.xml').data
+    assert b'/sitemap-posts-1.xml' in index and b'/sitemap-posts-2.xml' in index
+    # The second post stays in the first id range after the post before it is gone
+    assert b'/blog/2-post' in client.get('/sitemap-posts-1.xml').data
+    assert b'/blog/3-post' in client.get('/sitemap-posts-2.xml').data
+    assert client.get('/sitemap-posts-3.xml').status_code == 404
+
+
+def test_sitemap_rebuilt_after_another_workers_write(client, monkeypatch):
+    monkeypatch.setattr(sitemap.sitemap_cache, 'ttl', 60)
+    add_post('First')
+    client.get('/sitemap-posts-1.xml')
+    with db.engine.begin() as connection:
+        connection.execute(text("UPDATE blog_post SET slug = 'renamed'"))
+    assert b'renamed' not in client.get('/sitemap-posts-1.xml').data
+
+    now = cache.time()
+    monkeypatch.setattr(cache, 'time', lambda: now + 60)
+    assert b'renamed' in client.get('/sitemap-posts-1.xml').data
@@ -0,0 +1,45 @@
+import pytest
+
+from app import db
+from app.models import BlogPost, Project, RelatedContent, Tag, ContentType
+from app.utility.cache import page_cache, MemoryBackend
+
+
+@pytest.fixture
+def content(app):
+    page_cache.backend = MemoryBackend()
+    db.session.add_all(BlogPost(title=f'Post {i}', body='Body', extract='Extract', image='img/blog/post.png', slug=f'post-{i}')
+                       for i in range(3))
+    db.session.add(Project(title='Project', subtitle='Subtitle', extract='Extract', slug='project', tags=[Tag(title='Tag')]))
+    db.session.commit()
+
+
+def cached(client, url):
+    return client.get(url).headers['X-Cache'] == 'HIT'
+
+
+DETAIL_PAGES = ['/blog/1-post-0', '/blog/2-post-1', '/blog/3-post-2', '/portfolio/1-project']
+
+
+def test_related_link_only_purges_both_ends(client, content):
+    for url in DETAIL_PAGES:
+        client.get(url)
+    db.session.add(RelatedContent(ContentType.BLOG, 1, ContentType.PROJECT, 1))
+    db.session.commit()
+    assert [cached(client, url) for url in DETAIL_PAGES] == [False, True, True, False]
+
+
+def test_new_tag_keeps_detail_pages(client, content):
+    for url in DETAIL_PAGES:
+        client.get(url)
+    db.session.add(Tag(title='Other'))
+    db.session.commit()
+    assert all(cached(client, url) for url in DETAIL_PAGES)
+
+
+def test_renamed_tag_purges_the_pages_showing_it(client, content):
+    for url in DETAIL_PAGES:
+        client.get(url)
+    db.session.get(Tag, 1).title = 'Renamed'
+    db.session.commit()
+    assert [cached(client, url) for url in DETAIL_PAGES] == [True, True, True, False]
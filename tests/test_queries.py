@@ -0,0 +1,62 @@
+"""
+The listing and detail pages load everything they render through the for_card/for_detail query
+profiles, so the number of queries a page runs does not grow with the content it shows. Every count
+includes the aggregate query of the page's validators.
+"""
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import BlogPost, Project, ProjectFeature, ProjectSection, Tag, Technology, Category
+from app.models import ContentType, SectionType, TechnologyType
+
+
+def add_content(count: int) -> None:
+    """Posts and projects that each have several tags, technologies, features and sections"""
+    technologies = [Technology(title=f'Technology {i}', image=f'img/technology/{i}.png', type=TechnologyType.BACKEND)
+                    for i in range(4)]
+    tags = [Tag(title=f'Tag {i}') for i in range(4)]
+    category = Category(title='Category', color='#000000', type=ContentType.PROJECT)
+    for i in range(count):
+        db.session.add(Project(
+            title=f'Project {i}', subtitle='Subtitle', extract='Extract', slug=f'project-{i}', category=category,
+            deployment_url='https://example.com', featured_order=i,
+            tags=tags, technologies=technologies,
+            features=[ProjectFeature(title=f'Feature {j}', order=j) for j in range(3)],
+            sections=[ProjectSection(type=SectionType.OVERVIEW, body=f'Section {j}', order=j) for j in range(3)],
+        ))
+        db.session.add(BlogPost(
+            title=f'Post {i}', body='Body', extract='Extract', image='img/blog/post.png', slug=f'post-{i}',
+            tags=tags, technologies=technologies,
+        ))
+    db.session.commit()
+
+
+def count_queries(client, url: str) -> int:
+    """Queries run while answering a request, after a first request warmed the process-wide snapshots"""
+    assert client.get(url).status_code == 200
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        assert client.get(url).status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return len(statements)
+
+
+@pytest.mark.parametrize('count', [2, 10])
+@pytest.mark.parametrize('url, expected', [
+    ('/', 4),
+    ('/blog', 2),
+    ('/portfolio', 3),
+    ('/portfolio/1-project-0', 6),
+    ('/blog/1-post-0', 4),
+])
+def test_query_count_is_fixed(client, url, expected, count):
+    add_content(count)
+    assert count_queries(client, url) == expected
@@ -0,0 +1,21 @@
+from app import db
+from app.models import BlogPost, Project, RelatedContent, ContentType
+
+
+def test_deleting_content_deletes_only_its_links(app):
+    db.session.add_all(BlogPost(title=f'Post {i}', body='Body', extract='Extract', image='img/blog/post.png', slug=f'post-{i}')
+                       for i in range(2))
+    db.session.add(Project(title='Project', subtitle='Subtitle', extract='Extract', slug='project'))
+    db.session.add_all([
+        RelatedContent(ContentType.BLOG, 1, ContentType.PROJECT, 1),
+        RelatedContent(ContentType.BLOG, 2, ContentType.BLOG, 1),
+        # Project 1 shares its id with post 1, its other links are kept
+        RelatedContent(ContentType.BLOG, 2, ContentType.PROJECT, 1),
+    ])
+    db.session.commit()
+
+    db.session.delete(db.session.get(BlogPost, 1))
+    db.session.commit()
+    links = db.session.execute(db.select(RelatedContent.source_type, RelatedContent.source_id,
+                                         RelatedContent.target_type, RelatedContent.target_id)).all()
+    assert links == [(ContentType.BLOG, 2, ContentType.PROJECT, 1)]
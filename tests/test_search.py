@@ -0,0 +1,36 @@
+import pytest
+
+from app import db
+from app.models import BlogPost
+from app.utility.pagination import encode_cursor
+
+
+@pytest.fixture
+def posts(app):
+    db.session.add_all(BlogPost(title=f'Python {i}', body='Python', extract='Python', image='img/blog/post.png', slug=f'python-{i}')
+                       for i in range(5))
+    db.session.commit()
+
+
+def test_pages_follow_the_cursor(client, posts):
+    first = client.get('/api/search?q=python&limit=3').json
+    second = client.get(f'/api/search?q=python&limit=3&cursor={first["next_cursor"]}').json
+    ids = [result['id'] for result in first['results'] + second['results']]
+    assert sorted(ids) == [1, 2, 3, 4, 5]
+    assert second['next_cursor'] is None
+
+
+@pytest.mark.parametrize('cursor', [encode_cursor('x', 1), encode_cursor(1.0), encode_cursor(None, None), 'not-a-cursor'])
+def test_malformed_cursor_is_the_first_page(client, posts, cursor):
+    first = client.get('/api/search?q=python&limit=3').json
+    response = client.get(f'/api/search?q=python&limit=3&cursor={cursor}')
+    assert response.status_code == 200
+    assert response.json['results'] == first['results']
+    assert client.get(f'/search?q=python&cursor={cursor}').status_code == 200
+
+
+@pytest.mark.parametrize('limit, expected', [(0, 1), (-1, 1), (2, 2), (1000, 5)])
+def test_limit_is_clamped(client, posts, limit, expected):
+    response = client.get(f'/api/search?q=python&limit={limit}')
+    assert response.status_code == 200
+    assert len(response.json['results']) == expected
@@ -0,0 +1,46 @@
+import numpy as np
+
+from flask import g
+
+from app import db
+from app.models import BlogPost, ContentType, similar_content
+from app.utility.cache import page_cache
+from app.utility.similarity import SimilarityIndex
+
+DOCUMENTS = {
+    1: 'python flask web application routes templates',
+    2: 'python numpy arrays matrix vectors',
+    3: 'flask templates jinja rendering pages',
+    4: 'gardening tomatoes soil watering',
+}
+
+
+def scores(index):
+    return {key: dict(index.similar(key, k=3, min_score=-1)) for key in DOCUMENTS}
+
+
+def test_refresh_weights_every_row_like_a_build():
+    built = SimilarityIndex(64)
+    built.build(DOCUMENTS.items())
+
+    refreshed = SimilarityIndex(64)
+    refreshed.build(list(DOCUMENTS.items())[:2])
+    refreshed.mark_dirty([1, 3, 4])
+    refreshed.refresh(lambda keys: ((key, DOCUMENTS[key]) for key in keys))
+
+    for key, expected in scores(built).items():
+        actual = scores(refreshed)[key]
+        assert actual.keys() == expected.keys()
+        assert np.allclose([actual[k] for k in expected], list(expected.values()))
+
+
+def test_building_the_index_adds_no_page_dependencies(app):
+    app.config['ENABLE_SIMILARITY'] = True
+    db.session.add_all(BlogPost(title=f'Post {i}', body=text, extract='Extract', image='img/blog/post.png', slug=f'post-{i}')
+                       for i, text in enumerate(DOCUMENTS.values()))
+    db.session.commit()
+
+    with app.test_request_context('/blog/1-post-0'):
+        page_cache.tag('blogpost:1')
+        assert similar_content(ContentType.BLOG, 1)
+        assert g.cache_tags == {'blogpost:1'}